@@ -4,16 +4,11 @@ Daily Bible verse reader with AI-generated reflections and Q&A via OpenAI
 """
 import streamlit as st
 import os
-from datetime import datetime, time
-from dotenv import load_dotenv
-
-# Import our services
-from bible_service import BibleVerseService
-from openai_service import OpenAIService
-from conversation_store import ConversationStore
-
-# Load environment variables
-load_dotenv()
+import re
+import html
+import threading
+from collections import Counter
+from pathlib import Path
 
 # Page configuration
 st.set_page_config(
@@ -22,8 +17,18 @@ st.set_page_config(
     layout="wide"
 )
 
-# Custom CSS for inspirational churchy styling
-st.markdown("""
+# Load environment variables
+@st.cache_resource
+def _load_env():
+    """Load .env once per process instead of on every rerun"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+_load_env()
+
+# Custom CSS for inspirational churchy styling.
+# Fonts and base colors live in .streamlit/config.toml; only class-specific rules remain here.
+_CUSTOM_CSS = """
     <style>
     /* Semi-transparent chat boxes */
     .stChatMessage {
@@ -39,10 +44,9 @@ st.markdown("""
         border-left: 4px solid #8B6914;
     }
     
-    /* Headers with spiritual styling */
+    /* Headers with spiritual styling (serif font comes from the theme) */
     h1, h2, h3 {
         color: #8B6914 !important;
-        font-family: 'Georgia', serif;
     }
     
     /* Verse display boxes */
@@ -55,6 +59,18 @@ st.markdown("""
         box-shadow: 0 2px 8px rgba(139, 105, 20, 0.2);
     }
     
+    /* Reading plan rows */
+    .plan-row {
+        display: flex;
+        align-items: center;
+        gap: 15px;
+    }
+    
+    .plan-row .verse-box {
+        flex: 1;
+        margin: 5px 0;
+    }
+    
     /* Q&A response boxes */
     .qa-box {
         background: rgba(255, 255, 255, 0.7);
@@ -64,13 +80,29 @@ st.markdown("""
         margin: 12px 0;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
+
+# "Chapter:Verse" or "Chapter:Start-End"
+_REF_RE = re.compile(r"(\d+):(\d+)(?:-(\d+))?")
+
+# One reading plan row; filled per entry with %-formatting
+_PLAN_ROW_TPL = (
+    "<div class='plan-row'><strong>#%(idx)d</strong>"
+    "<div class='verse-box'><strong>📖 %(ref)s</strong><br/><small>%(tag)s</small></div></div>"
+)
 
 # Initialize services
 @st.cache_resource
 def init_services():
     """Initialize all services (cached)"""
     try:
+        # Imported here so the service modules load once per process, not at script top
+        from bible_service import BibleVerseService
+        from openai_service import OpenAIService
+        from conversation_store import ConversationStore
+        
         bible_service = BibleVerseService()
         openai_service = OpenAIService()
         conversation_store = ConversationStore()
@@ -82,6 +114,226 @@ def init_services():
 
 bible_service, openai_service, conversation_store = init_services()
 
+@st.cache_data
+def _get_books(_svc):
+    """Return the list of available books (cached)"""
+    return _svc.get_book_list()
+
+@st.cache_data
+def _get_book_indices(_svc):
+    """Map each book name to its position in the book list (cached)"""
+    return {name: idx for idx, name in enumerate(_get_books(_svc))}
+
+@st.cache_resource
+def _setup_markdown():
+    """Read the setup instructions shown in the Setup tab (once per process)"""
+    return (Path(__file__).resolve().parent / 'setup.md').read_text(encoding='utf-8')
+
+def _bg(fn, *args, **kwargs):
+    """Run fn in a daemon thread so slow writes don't block the script"""
+    threading.Thread(target=fn, args=args, kwargs=kwargs, daemon=True).start()
+
+def _format_ref(book, chapter, start_verse, end_verse):
+    """Build a verse reference string such as John 3:16 or Psalms 23:1-6"""
+    # Imported here like the services; shared with the scheduler so stored reflection keys match
+    from bible_service import format_reference
+    return format_reference(book, chapter, start_verse, end_verse)
+
+def _to_html(text):
+    """Escape text and convert newlines to <br/> for rendering inside an HTML block"""
+    return html.escape(text).replace("\n", "<br/>")
+
+def _segments(text):
+    """Count SMS segments: 160/153 characters for plain ASCII, 70/67 UTF-16 units otherwise"""
+    if all(ord(c) < 128 for c in text):
+        length, single, multi = len(text), 160, 153
+    else:
+        length, single, multi = len(text.encode('utf-16-le')) // 2, 70, 67
+    if length <= single:
+        return 1
+    return -(-length // multi)
+
+def _parse_ref(ref_str):
+    """Parse a chapter/verse reference into (chapter, start_verse, end_verse), or None if malformed"""
+    match = _REF_RE.fullmatch(ref_str.strip())
+    if not match:
+        return None
+    chapter, start_verse, end_verse = match.groups()
+    chapter, start_verse = int(chapter), int(start_verse)
+    end_verse = int(end_verse) if end_verse is not None else start_verse
+    # Same bounds the number inputs used to enforce: chapters and verses start at 1
+    if chapter < 1 or start_verse < 1 or end_verse < start_verse:
+        return None
+    return chapter, start_verse, end_verse
+
+def _remove_from_plan(store, delete_options):
+    """Form callback: delete the reading plan entries selected for removal"""
+    to_remove = st.session_state.plan_remove
+    for label in to_remove:
+        store.delete_reading_plan_item(delete_options[label])
+    if to_remove:
+        st.session_state.plan_version += 1
+
+@st.cache_data(ttl=60)
+def _get_plan(_store, plan_version):
+    """Return reading plan items (cached until the plan changes)"""
+    return _store.get_reading_plan()
+
+@st.cache_data(ttl=60, max_entries=16, show_spinner=False)
+def _render_plan(plan_rows):
+    """Build the reading plan HTML and removal options from (id, reference, include_reflection) rows (cached)"""
+    html_parts = []
+    delete_options = {}
+    for idx, (item_id, verse_ref, include_reflection) in enumerate(plan_rows, 1):
+        delete_options[f"#{idx} {verse_ref}"] = item_id
+        html_parts.append(_PLAN_ROW_TPL % {
+            "idx": idx,
+            "ref": verse_ref,
+            "tag": "✨ With reflection" if include_reflection else "📝 Verse only",
+        })
+    return "".join(html_parts), delete_options
+
+class _VerseUnavailable(Exception):
+    """Raised from _cached_verse so a missed lookup is not cached"""
+
+@st.cache_data(ttl=86400, max_entries=2048, show_spinner=False)
+def _cached_verse(_svc, book, chapter, start_verse, end_verse):
+    """Fetch verse text (cached; verses never change, misses are retried)"""
+    verse_text = _svc.get_verse(book, chapter, start_verse, end_verse)
+    if not verse_text:
+        raise _VerseUnavailable()
+    return verse_text
+
+class _AnswerUnavailable(Exception):
+    """Raised from _cached_answer so a failed answer is not cached"""
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _cached_answer(_svc, question):
+    """Answer a standalone question with OpenAI (cached for an hour; failures are not cached)"""
+    answer = _svc.answer_question(question, [])
+    if answer == _svc.ANSWER_FALLBACK:
+        raise _AnswerUnavailable(answer)
+    return answer
+
+@st.fragment
+def _ref_preview(book, chapter, start_verse, end_verse):
+    """Small "Selected Verse" box next to the verse picker"""
+    st.markdown(f"""
+    <div class='verse-box'>
+        <strong>Selected Verse:</strong><br/>
+        {_format_ref(book, chapter, start_verse, end_verse)}
+    </div>
+    """, unsafe_allow_html=True)
+
+@st.fragment
+def _verse_fragment(bible_service, openai_service, conversation_store, selected_book,
+                    chapter, start_verse, end_verse, include_reflection):
+    """Preview button and verse display (reruns independently of the rest of the page)"""
+    if st.button("📖 View Verse & Reflection", type="primary", use_container_width=True):
+        with st.status("Fetching verse...", expanded=True) as status:
+            # Fetch verse
+            try:
+                verse_text = _cached_verse(bible_service, selected_book, chapter, start_verse, end_verse)
+            except _VerseUnavailable:
+                verse_text = None
+            
+            if verse_text:
+                verse_ref = _format_ref(selected_book, chapter, start_verse, end_verse)
+                
+                if not include_reflection:
+                    formatted_message = openai_service.format_verse_with_reflection(verse_text, verse_ref, False)
+                else:
+                    # Reuse a stored reflection (pre-generated from the reading plan or streamed
+                    # before), otherwise stream a new one so the first words show right away
+                    formatted_message = conversation_store.get_reflection(
+                        verse_ref, verse_text, openai_service.doctrine_fingerprint
+                    )
+                    if not formatted_message:
+                        status.update(label="Writing reflection...")
+                        reflection = openai_service.stream_verse_with_reflection(verse_text, verse_ref)
+                        formatted_message = st.write_stream(reflection).strip()
+                        # Keep only a reply that streamed in full; fallback text or a cut-off
+                        # reply is shown this once and regenerated next time
+                        if reflection.complete:
+                            _bg(conversation_store.save_reflection, verse_ref, verse_text, formatted_message,
+                                openai_service.doctrine_fingerprint)
+                
+                # Save to both session state and persistent storage
+                st.session_state.preview_message = formatted_message
+                st.session_state.preview_message_html = _to_html(formatted_message)
+                st.session_state.preview_segments = _segments(formatted_message)
+                st.session_state.current_verse_ref = verse_ref
+                
+                # Save to persistent storage in the background so it survives app restarts;
+                # session state already holds what this run needs to display
+                _bg(
+                    conversation_store.save_verse_selection,
+                    book=selected_book,
+                    chapter=chapter,
+                    start_verse=start_verse,
+                    end_verse=end_verse,
+                    preview_message=formatted_message,
+                    verse_ref=verse_ref
+                )
+                status.update(label=f"✅ {verse_ref}", state="complete", expanded=False)
+            else:
+                status.update(label="Could not fetch verse", state="error")
+                st.error("Could not fetch verse. Please check the reference.")
+    
+    # Display verse and reflection
+    if 'preview_message' in st.session_state:
+        st.markdown("---")
+        st.markdown(f"""
+        <div class='verse-box'>
+            <h3 style='margin-top: 0;'>{st.session_state.get('current_verse_ref', 'Scripture')}</h3>
+            <div style='font-size: 1.1em; line-height: 1.6;'>
+                {st.session_state.preview_message_html}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        segments = st.session_state.get('preview_segments')
+        if segments and segments > 1:
+            st.caption(f"📱 Sent as SMS this message takes {segments} segments")
+
+@st.fragment
+def _qa_fragment(openai_service):
+    """Q&A input and answer display (reruns independently of the rest of the page)"""
+    st.markdown("---")
+    st.markdown("### 💭 Ask a Question")
+    st.markdown("Ask any question about the Bible, faith, or theology and receive thoughtful, doctrine-based answers.")
+    
+    question = st.text_area(
+        "Your Question:", 
+        placeholder="What does this verse mean in daily life?\nHow can I apply this teaching?\nWhat does the Bible say about forgiveness?",
+        height=100,
+        key="qa_question"
+    )
+    
+    col_qa1, col_qa2 = st.columns([1, 3])
+    with col_qa1:
+        ask_button = st.button("🤔 Get Answer", type="secondary", use_container_width=True)
+    
+    if ask_button and question:
+        with st.spinner("Seeking wisdom..."):
+            # Questions asked here carry no conversation history, so identical ones share an answer
+            try:
+                answer = _cached_answer(openai_service, question)
+            except _AnswerUnavailable:
+                answer = openai_service.ANSWER_FALLBACK
+            st.session_state.last_answer_html = _to_html(answer)
+            
+            st.markdown(f"""
+            <div class='qa-box'>
+                <h4 style='color: #8B6914; margin-top: 0;'>📜 Answer:</h4>
+                <div style='line-height: 1.6;'>
+                    {st.session_state.last_answer_html}
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+    elif ask_button and not question:
+        st.warning("Please enter a question to receive an answer.")
+
 # Title and description with spiritual styling
 st.markdown("<h1 style='text-align: center; color: #8B6914;'>📖 Daily Bible Verse Reader 🙏</h1>", unsafe_allow_html=True)
 st.markdown("<p style='text-align: center; font-style: italic; color: #2C1810;'>Experience God's Word with AI-powered reflections and thoughtful Q&A</p>", unsafe_allow_html=True)
@@ -119,8 +371,14 @@ with st.sidebar:
 if not all([bible_service, openai_service, conversation_store]):
     st.stop()
 
-# Restore last verse selection from persistent storage
-last_selection = conversation_store.get_verse_selection()
+# Restore last verse selection from persistent storage (read once per session, not every rerun)
+if 'last_selection' not in st.session_state:
+    st.session_state.last_selection = conversation_store.get_verse_selection()
+last_selection = st.session_state.last_selection
+
+# Bumped whenever the reading plan is modified so the cached plan is refetched
+if 'plan_version' not in st.session_state:
+    st.session_state.plan_version = 0
 
 # Main interface tabs
 tab1, tab2, tab3 = st.tabs(["📖 Bible Verses & Q&A", "📅 Reading Plan", "ℹ️ Setup"])
@@ -133,116 +391,46 @@ with tab1:
     
     with col1:
         # Book selection with restoration of last selection
-        books = bible_service.get_book_list()
+        books = _get_books(bible_service)
+        book_indices = _get_book_indices(bible_service)
         
         # Determine default book index
-        default_book = last_selection.get('book') or "John"
-        default_book_index = books.index(default_book) if default_book in books else (books.index("John") if "John" in books else 0)
+        default_book_index = book_indices.get(last_selection.get('book'), bible_service.DEFAULT_BOOK_INDEX)
         
         selected_book = st.selectbox("Select Book", books, index=default_book_index)
         
         # Chapter and verse selection with restoration
-        col_ch, col_v1, col_v2 = st.columns(3)
-        with col_ch:
-            chapter = st.number_input("Chapter", min_value=1, max_value=150, value=last_selection.get('chapter', 3))
-        with col_v1:
-            start_verse = st.number_input("Start Verse", min_value=1, max_value=176, value=last_selection.get('start_verse', 16))
-        with col_v2:
-            end_verse = st.number_input("End Verse", min_value=1, max_value=176, value=last_selection.get('end_verse', 16))
+        last_chapter = last_selection.get('chapter', 3)
+        last_start = last_selection.get('start_verse', 16)
+        last_end = last_selection.get('end_verse', 16)
+        ref_str = st.text_input(
+            "Chapter:Verse or Chapter:Start-End",
+            f"{last_chapter}:{last_start}" + (f"-{last_end}" if last_end != last_start else "")
+        )
+        parsed_ref = _parse_ref(ref_str)
+        if parsed_ref:
+            chapter, start_verse, end_verse = parsed_ref
+        else:
+            st.warning("Please enter a reference like 3:16 or 3:16-18.")
+            chapter, start_verse, end_verse = last_chapter, last_start, last_end
         
         # Options
         include_reflection = st.checkbox("Include AI-generated reflection", value=True)
     
     with col2:
-        st.markdown(f"""
-        <div class='verse-box'>
-            <strong>Selected Verse:</strong><br/>
-            {selected_book} {chapter}:{start_verse}{f"-{end_verse}" if end_verse != start_verse else ""}
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Preview section
-    if st.button("📖 View Verse & Reflection", type="primary", use_container_width=True):
-        with st.spinner("Fetching and formatting verse..."):
-            # Fetch verse
-            verse_text = bible_service.get_verse(selected_book, chapter, start_verse, end_verse)
-            
-            if verse_text:
-                verse_ref = f"{selected_book} {chapter}:{start_verse}"
-                if end_verse != start_verse:
-                    verse_ref += f"-{end_verse}"
-                
-                # Format with OpenAI
-                formatted_message = openai_service.format_verse_with_reflection(
-                    verse_text, verse_ref, include_reflection
-                )
-                
-                # Save to both session state and persistent storage
-                st.session_state.preview_message = formatted_message
-                st.session_state.current_verse_ref = verse_ref
-                
-                # Save to persistent storage so it survives app restarts
-                conversation_store.save_verse_selection(
-                    book=selected_book,
-                    chapter=chapter,
-                    start_verse=start_verse,
-                    end_verse=end_verse,
-                    preview_message=formatted_message,
-                    verse_ref=verse_ref
-                )
-            else:
-                st.error("Could not fetch verse. Please check the reference.")
+        _ref_preview(selected_book, chapter, start_verse, end_verse)
     
     # Initialize session state from persistent storage if not already set
     if 'preview_message' not in st.session_state and last_selection.get('preview_message'):
         st.session_state.preview_message = last_selection['preview_message']
+        st.session_state.preview_message_html = _to_html(last_selection['preview_message'])
+        st.session_state.preview_segments = _segments(last_selection['preview_message'])
         st.session_state.current_verse_ref = last_selection.get('current_verse_ref', '')
     
-    # Display verse and reflection
-    if 'preview_message' in st.session_state:
-        st.markdown("---")
-        st.markdown(f"""
-        <div class='verse-box'>
-            <h3 style='margin-top: 0;'>{st.session_state.get('current_verse_ref', 'Scripture')}</h3>
-            <div style='font-size: 1.1em; line-height: 1.6;'>
-                {st.session_state.preview_message.replace('\n', '<br/>')}
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Q&A Section
-    st.markdown("---")
-    st.markdown("### 💭 Ask a Question")
-    st.markdown("Ask any question about the Bible, faith, or theology and receive thoughtful, doctrine-based answers.")
-    
-    question = st.text_area(
-        "Your Question:", 
-        placeholder="What does this verse mean in daily life?\nHow can I apply this teaching?\nWhat does the Bible say about forgiveness?",
-        height=100,
-        key="qa_question"
-    )
-    
-    col_qa1, col_qa2 = st.columns([1, 3])
-    with col_qa1:
-        ask_button = st.button("🤔 Get Answer", type="secondary", use_container_width=True)
-    
-    if ask_button and question:
-        with st.spinner("Seeking wisdom..."):
-            # Get conversation history for context (if any)
-            conv_history = []
-            
-            answer = openai_service.answer_question(question, conv_history)
-            
-            st.markdown(f"""
-            <div class='qa-box'>
-                <h4 style='color: #8B6914; margin-top: 0;'>📜 Answer:</h4>
-                <div style='line-height: 1.6;'>
-                    {answer.replace('\n', '<br/>')}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-    elif ask_button and not question:
-        st.warning("Please enter a question to receive an answer.")
+    # Preview section and Q&A section rerun on their own without reprocessing the other tabs
+    _verse_fragment(bible_service, openai_service, conversation_store,
+                    selected_book, chapter, start_verse, end_verse, include_reflection)
+    _qa_fragment(openai_service)
 
 
 # Tab 2: Reading Plan
@@ -251,7 +439,7 @@ with tab2:
     st.markdown("Plan your Bible reading journey in advance. Add verses you want to study and organize your devotional time.")
     
     # Book selection for scheduling
-    books = bible_service.get_book_list()
+    books = _get_books(bible_service)
     
     col1, col2 = st.columns([3, 2])
     
@@ -260,15 +448,9 @@ with tab2:
         
         # Create a form for adding verses
         with st.form("add_reading_plan", clear_on_submit=True):
-            plan_book = st.selectbox("Book", books, key="plan_book", index=books.index("Psalms") if "Psalms" in books else 0)
+            plan_book = st.selectbox("Book", books, key="plan_book", index=bible_service.SCHEDULE_DEFAULT_BOOK_INDEX)
             
-            col_ch, col_v1, col_v2 = st.columns(3)
-            with col_ch:
-                plan_chapter = st.number_input("Chapter", min_value=1, max_value=150, value=1, key="plan_ch")
-            with col_v1:
-                plan_start = st.number_input("Start Verse", min_value=1, max_value=176, value=1, key="plan_v1")
-            with col_v2:
-                plan_end = st.number_input("End Verse", min_value=1, max_value=176, value=6, key="plan_v2")
+            plan_ref_str = st.text_input("Chapter:Verse or Chapter:Start-End", "1:1-6", key="plan_ref")
             
             plan_reflection = st.checkbox("Include reflection", value=True, key="plan_refl")
             plan_notes = st.text_area("Notes (optional)", placeholder="Why this passage? What are you hoping to learn?", key="plan_notes")
@@ -276,31 +458,37 @@ with tab2:
             submitted = st.form_submit_button("➕ Add to Plan", type="primary", use_container_width=True)
             
             if submitted:
-                conversation_store.add_reading_plan_item(
-                    book=plan_book,
-                    chapter=plan_chapter,
-                    start_verse=plan_start,
-                    end_verse=plan_end,
-                    include_reflection=plan_reflection
-                )
-                st.success(f"✅ Added {plan_book} {plan_chapter}:{plan_start}-{plan_end} to your reading plan!")
-                st.rerun()
+                parsed_plan_ref = _parse_ref(plan_ref_str)
+                if not parsed_plan_ref:
+                    st.warning("Please enter a reference like 23:1 or 23:1-6.")
+                else:
+                    plan_chapter, plan_start, plan_end = parsed_plan_ref
+                    conversation_store.add_reading_plan_item(
+                        book=plan_book,
+                        chapter=plan_chapter,
+                        start_verse=plan_start,
+                        end_verse=plan_end,
+                        include_reflection=plan_reflection
+                    )
+                    st.session_state.plan_version += 1
+                    st.success(f"✅ Added {_format_ref(plan_book, plan_chapter, plan_start, plan_end)} to your reading plan!")
+    
+    # Read the plan once for both the overview and the list below; this happens after the
+    # add form is processed, so a new entry shows up without an extra rerun
+    scheduled = _get_plan(conversation_store, st.session_state.plan_version)
     
     with col2:
         st.subheader("📊 Reading Plan Overview")
-        scheduled = conversation_store.get_pending_scheduled_messages()
         
         if scheduled:
             st.metric("Total Passages", len(scheduled))
             
             # Count by book
-            books_in_plan = {}
-            for msg in scheduled:
-                books_in_plan[msg['book']] = books_in_plan.get(msg['book'], 0) + 1
+            books_in_plan = Counter(msg['book'] for msg in scheduled)
             
-            st.markdown("**Books in Plan:**")
-            for book, count in sorted(books_in_plan.items()):
-                st.markdown(f"- {book}: {count} passage(s)")
+            st.markdown("**Books in Plan:**\n\n" + "\n".join(
+                f"- {book}: {count} passage(s)" for book, count in sorted(books_in_plan.items())
+            ))
         else:
             st.info("No passages in your reading plan yet!")
     
@@ -308,29 +496,45 @@ with tab2:
     st.markdown("---")
     st.subheader("📖 Your Reading Plan")
     
-    scheduled = conversation_store.get_pending_scheduled_messages()
-    
     if scheduled:
-        for idx, msg in enumerate(scheduled, 1):
-            verse_ref = f"{msg['book']} {msg['chapter']}:{msg['start_verse']}"
-            if msg['end_verse'] != msg['start_verse']:
-                verse_ref += f"-{msg['end_verse']}"
-            
-            with st.container():
-                col1, col2, col3 = st.columns([1, 6, 1])
-                with col1:
-                    st.markdown(f"**#{idx}**")
-                with col2:
-                    st.markdown(f"""
-                    <div class='verse-box' style='margin: 5px 0;'>
-                        <strong>📖 {verse_ref}</strong><br/>
-                        <small>{'✨ With reflection' if msg['include_reflection'] else '📝 Verse only'}</small>
-                    </div>
-                    """, unsafe_allow_html=True)
-                with col3:
-                    if st.button("🗑️", key=f"del_{msg['id']}", help="Remove from plan"):
-                        conversation_store.delete_scheduled_message(msg['id'])
-                        st.rerun()
+        def plan_ref(msg):
+            return _format_ref(msg['book'], msg['chapter'], msg['start_verse'], msg['end_verse'])
+        
+        # Render the whole plan in a single element, reusing the HTML until the plan changes
+        plan_html, delete_options = _render_plan(tuple(
+            (msg['id'], plan_ref(msg), msg['include_reflection']) for msg in scheduled
+        ))
+        st.markdown(plan_html, unsafe_allow_html=True)
+        
+        # One removal form instead of a delete button per row; the callback runs before
+        # the natural rerun, so the list above is already up to date when it redraws
+        with st.form("remove_reading_plan", clear_on_submit=True):
+            st.multiselect("Remove from plan", list(delete_options), key="plan_remove")
+            st.form_submit_button("🗑️ Remove selected", on_click=_remove_from_plan,
+                                  args=(conversation_store, delete_options))
+        
+        if st.button("✨ Pre-generate reflections for plan", use_container_width=True):
+            with st.spinner("Preparing reflections for your reading plan..."):
+                to_prepare = [msg for msg in scheduled if msg['include_reflection']]
+                verses = bible_service.get_verses_batch([
+                    (msg['book'], msg['chapter'], msg['start_verse'], msg['end_verse']) for msg in to_prepare
+                ])
+                items = []
+                for msg in to_prepare:
+                    verse_text = verses[(msg['book'], msg['chapter'], msg['start_verse'], msg['end_verse'])]
+                    if verse_text:
+                        items.append({'verse_text': verse_text, 'verse_reference': plan_ref(msg)})
+                
+                # Only real model output is stored; failed verses are retried next time
+                prepared = 0
+                for item, message in zip(items, openai_service.format_verses_batch(items, fallback=False)):
+                    if message:
+                        conversation_store.save_reflection(item['verse_reference'], item['verse_text'], message,
+                                                          openai_service.doctrine_fingerprint)
+                        prepared += 1
+            st.success(f"✅ Prepared {prepared} reflection(s). They will be used when you view these passages.")
+            if prepared < len(items):
+                st.warning(f"{len(items) - prepared} reflection(s) could not be generated. Please try again later.")
     else:
         st.info("📝 Your reading plan is empty. Add passages above to get started!")
     
@@ -349,92 +553,7 @@ with tab2:
 with tab3:
     st.header("ℹ️ Setup & Information")
     
-    st.markdown("""
-    ### 🚀 Getting Started
-    
-    #### 1. Environment Variables
-    Create a `.env` file (or use Streamlit secrets) with:
-    
-    ```bash
-    # OpenAI (Required)
-    OPENAI_API_KEY=your_openai_api_key
-    
-    # Church Configuration
-    CHURCH_DOCTRINE=Your church's doctrinal perspective
-    
-    # Bible API (Optional - for full verse text)
-    BIBLE_API_KEY=your_api_bible_key
-    ```
-    
-    #### 2. Install Dependencies
-    ```bash
-    pip install -r requirements.txt
-    ```
-    
-    #### 3. Run the Application
-    ```bash
-    streamlit run app.py
-    ```
-    
-    #### 4. Deploy on Streamlit Cloud
-    
-    **GitHub Deployment:**
-    1. Push this code to GitHub
-    2. Deploy on Streamlit Community Cloud:
-       - Go to share.streamlit.io
-       - Connect your GitHub repo
-       - Add secrets in the Streamlit dashboard
-    
-    **Alternative Platforms:**
-    - Heroku
-    - Google Cloud Run
-    - AWS Elastic Beanstalk
-    
-    ### 📚 API Keys Required
-    
-    1. **OpenAI API Key**: Get from https://platform.openai.com/api-keys
-    2. **Bible API Key** (Optional): Get from https://scripture.api.bible/
-    
-    ### 🔧 Features
-    
-    ✅ Browse and read Bible verses  
-    ✅ AI-generated reflections with OpenAI  
-    ✅ Ask theological questions with AI Q&A  
-    ✅ Create and manage reading plans  
-    ✅ Doctrinal perspective customization  
-    ✅ Beautiful, inspirational interface  
-    
-    ### 📖 How to Use This App
-    
-    **Bible Verses & Q&A Tab:**
-    - Select any Bible passage and view it with optional AI reflection
-    - Ask questions about faith, theology, or specific verses
-    - Receive thoughtful answers based on your church's doctrine
-    
-    **Reading Plan Tab:**
-    - Add verses to your personal reading plan
-    - Organize your Bible study schedule
-    - Track which passages you want to explore
-    - Remove completed readings
-    
-    ### 🎨 Customization
-    
-    **Church Doctrine:**
-    Customize the `CHURCH_DOCTRINE` environment variable to reflect your theological perspective:
-    
-    ```env
-    CHURCH_DOCTRINE="Reformed Baptist perspective emphasizing the sovereignty of God, justification by faith alone, and the authority of Scripture"
-    ```
-    
-    This influences how the AI answers questions about faith and doctrine.
-    
-    ### 📝 Notes
-    
-    - **Bible API**: Without an API key, verse references will be shown but full text may be limited
-    - **AI Responses**: Powered by OpenAI GPT models, answers reflect your configured doctrine
-    - **Privacy**: All data stored locally in SQLite database
-    - **Reading Plans**: Use as a personal devotional guide
-    """)
+    st.markdown(_setup_markdown())
     
     st.markdown("---")
     st.markdown("### 🐓 Rooster - Wake up to God's Word daily!")
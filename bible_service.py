@@ -1,24 +1,134 @@
 """
 Bible verse fetching module using API.Bible
-Falls back to local data if API is unavailable
+Serves KJV text from a bundled local database when present, with API.Bible as fallback
 """
 import os
+import logging
+import sqlite3
+import threading
+from pathlib import Path
 import requests
-from typing import Optional, Dict, List
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional, Dict, List, Tuple
 
-load_dotenv()
+log = logging.getLogger(__name__)
+
+# Read once at import; entry points load .env before importing this module
+_API_KEY = os.getenv('BIBLE_API_KEY', '')
+
+# Bundled read-only KJV text, built with build_kjv_db.py
+KJV_DB_PATH = Path(__file__).resolve().parent / 'data' / 'kjv.sqlite'
+
+# Books offered in the UI, in canonical order
+_BOOK_LIST: Tuple[str, ...] = (
+    "Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy",
+    "Joshua", "Judges", "Ruth", "1 Samuel", "2 Samuel",
+    "1 Kings", "2 Kings", "Psalms", "Proverbs", "Isaiah", "Jeremiah",
+    "Matthew", "Mark", "Luke", "John", "Acts", "Romans",
+    "1 Corinthians", "2 Corinthians", "Galatians", "Ephesians",
+    "Philippians", "Colossians", "1 Thessalonians", "2 Thessalonians",
+    "1 Timothy", "2 Timothy", "Titus", "Hebrews", "James",
+    "1 Peter", "2 Peter", "1 John", "2 John", "3 John", "Jude", "Revelation"
+)
+
+# Lowercase book names and abbreviations -> API.Bible book ID (simplified mapping - extend as needed)
+_BOOK_ID_MAP: Dict[str, str] = {
+    # Old Testament
+    'genesis': 'GEN', 'gen': 'GEN',
+    'exodus': 'EXO', 'exo': 'EXO',
+    'leviticus': 'LEV', 'lev': 'LEV',
+    'numbers': 'NUM', 'num': 'NUM',
+    'deuteronomy': 'DEU', 'deu': 'DEU',
+    'joshua': 'JOS', 'jos': 'JOS',
+    'judges': 'JDG', 'jdg': 'JDG',
+    'ruth': 'RUT', 'rut': 'RUT',
+    '1 samuel': '1SA', '1sa': '1SA', '1 sam': '1SA',
+    '2 samuel': '2SA', '2sa': '2SA', '2 sam': '2SA',
+    '1 kings': '1KI', '1ki': '1KI', '1 kg': '1KI',
+    '2 kings': '2KI', '2ki': '2KI', '2 kg': '2KI',
+    'psalms': 'PSA', 'psa': 'PSA', 'psalm': 'PSA',
+    'proverbs': 'PRO', 'pro': 'PRO',
+    'isaiah': 'ISA', 'isa': 'ISA',
+    'jeremiah': 'JER', 'jer': 'JER',
+    # New Testament
+    'matthew': 'MAT', 'mat': 'MAT', 'matt': 'MAT',
+    'mark': 'MRK', 'mrk': 'MRK',
+    'luke': 'LUK', 'luk': 'LUK',
+    'john': 'JHN', 'jhn': 'JHN',
+    'acts': 'ACT', 'act': 'ACT',
+    'romans': 'ROM', 'rom': 'ROM',
+    '1 corinthians': '1CO', '1co': '1CO', '1 cor': '1CO',
+    '2 corinthians': '2CO', '2co': '2CO', '2 cor': '2CO',
+    'galatians': 'GAL', 'gal': 'GAL',
+    'ephesians': 'EPH', 'eph': 'EPH',
+    'philippians': 'PHP', 'php': 'PHP',
+    'colossians': 'COL', 'col': 'COL',
+    '1 thessalonians': '1TH', '1th': '1TH', '1 thess': '1TH',
+    '2 thessalonians': '2TH', '2th': '2TH', '2 thess': '2TH',
+    '1 timothy': '1TI', '1ti': '1TI', '1 tim': '1TI',
+    '2 timothy': '2TI', '2ti': '2TI', '2 tim': '2TI',
+    'titus': 'TIT', 'tit': 'TIT',
+    'hebrews': 'HEB', 'heb': 'HEB',
+    'james': 'JAS', 'jas': 'JAS',
+    '1 peter': '1PE', '1pe': '1PE', '1 pet': '1PE',
+    '2 peter': '2PE', '2pe': '2PE', '2 pet': '2PE',
+    '1 john': '1JN', '1jn': '1JN',
+    '2 john': '2JN', '2jn': '2JN',
+    '3 john': '3JN', '3jn': '3JN',
+    'jude': 'JUD', 'jud': 'JUD',
+    'revelation': 'REV', 'rev': 'REV',
+}
+
+# Exact UI book names -> book ID, so lookups from the book list need no case folding
+_CANONICAL_TO_ID: Dict[str, str] = {book: _BOOK_ID_MAP[book.lower()] for book in _BOOK_LIST}
+
+# Default selectbox positions in the book list, computed once at import
+DEFAULT_BOOK_INDEX = _BOOK_LIST.index("John")
+SCHEDULE_DEFAULT_BOOK_INDEX = _BOOK_LIST.index("Psalms")
+
+def format_reference(book: str, chapter: int, start_verse: int, end_verse: int) -> str:
+    """
+    Build a verse reference string such as John 3:16 or Psalms 23:1-6
+    
+    Stored reflections are keyed by this string, so the app and the
+    scheduler must both build references with it.
+    """
+    if start_verse == end_verse:
+        return f"{book} {chapter}:{start_verse}"
+    return f"{book} {chapter}:{start_verse}-{end_verse}"
 
 class BibleVerseService:
+    DEFAULT_BOOK_INDEX = DEFAULT_BOOK_INDEX
+    SCHEDULE_DEFAULT_BOOK_INDEX = SCHEDULE_DEFAULT_BOOK_INDEX
+    
     def __init__(self):
-        self.api_key = os.getenv('BIBLE_API_KEY', '')
+        self.api_key = _API_KEY
+        self._has_api = bool(self.api_key)
         self.base_url = "https://api.scripture.api.bible/v1"
         # Using KJV Bible ID from API.Bible
         self.bible_id = "de4e12af7f28f599-02"  # KJV
         
+        # Pooled session so repeated lookups reuse the TLS connection
+        self._session = requests.Session()
+        retry = Retry(total=2, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504])
+        self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+        self._session.headers.update({
+            'api-key': self.api_key,
+            'accept': 'application/json'
+        })
+        
+        # Local KJV database; immutable=1 skips all locking for this read-only file
+        self._db = None
+        self._db_lock = threading.Lock()
+        if KJV_DB_PATH.exists():
+            self._db = sqlite3.connect(f"{KJV_DB_PATH.as_uri()}?mode=ro&immutable=1",
+                                       uri=True, check_same_thread=False)
+        
     def get_verse(self, book: str, chapter: int, start_verse: int, end_verse: Optional[int] = None) -> Optional[str]:
         """
-        Fetch Bible verses from API.Bible or fallback
+        Fetch Bible verses from the local KJV database or API.Bible
         
         Args:
             book: Book name (e.g., "Genesis", "John")
@@ -27,19 +137,57 @@ class BibleVerseService:
             end_verse: Ending verse number (optional)
         
         Returns:
-            Formatted verse text or None if not found
+            Formatted verse text, or None if not found or no verse source is available
         """
         if not end_verse:
             end_verse = start_verse
             
         try:
-            if self.api_key:
+            if self._db:
+                verse_text = self._fetch_local(book, chapter, start_verse, end_verse)
+                if verse_text:
+                    return verse_text
+            if self._has_api:
                 return self._fetch_from_api(book, chapter, start_verse, end_verse)
-            else:
-                return self._fetch_fallback(book, chapter, start_verse, end_verse)
+            return None
         except Exception as e:
-            print(f"Error fetching verse: {e}")
-            return self._fetch_fallback(book, chapter, start_verse, end_verse)
+            log.error("Error fetching verse: %s", e)
+            return None
+    
+    def get_verses_batch(self, refs: List[Tuple[str, int, int, int]],
+                         max_workers: int = 8) -> Dict[Tuple[str, int, int, int], Optional[str]]:
+        """
+        Fetch several passages concurrently
+        
+        Args:
+            refs: List of (book, chapter, start_verse, end_verse) tuples
+            max_workers: Maximum number of requests in flight at once
+        
+        Returns:
+            Dict mapping each distinct reference tuple to its verse text (or None)
+        """
+        unique_refs = list(dict.fromkeys(refs))
+        if not unique_refs:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_refs))) as executor:
+            texts = executor.map(lambda ref: self.get_verse(*ref), unique_refs)
+            return dict(zip(unique_refs, texts))
+    
+    def _fetch_local(self, book: str, chapter: int, start_verse: int, end_verse: int) -> Optional[str]:
+        """Fetch from the bundled KJV database"""
+        book_id = self._get_book_id(book)
+        if not book_id:
+            return None
+        
+        with self._db_lock:
+            rows = self._db.execute(
+                'SELECT verse, text FROM verses WHERE book_id = ? AND chapter = ? '
+                'AND verse BETWEEN ? AND ? ORDER BY verse',
+                (book_id, chapter, start_verse, end_verse)
+            ).fetchall()
+        
+        # Same shape as API.Bible text content with verse numbers
+        return " ".join(f"[{verse}] {text}" for verse, text in rows) or None
     
     def _fetch_from_api(self, book: str, chapter: int, start_verse: int, end_verse: int) -> Optional[str]:
         """Fetch from API.Bible"""
@@ -55,10 +203,6 @@ class BibleVerseService:
             else:
                 passage_id = f"{book_id}.{chapter}.{start_verse}-{book_id}.{chapter}.{end_verse}"
             
-            headers = {
-                'api-key': self.api_key
-            }
-            
             url = f"{self.base_url}/bibles/{self.bible_id}/passages/{passage_id}"
             params = {
                 'content-type': 'text',
@@ -68,86 +212,21 @@ class BibleVerseService:
                 'include-verse-numbers': 'true'
             }
             
-            response = requests.get(url, headers=headers, params=params, timeout=10)
+            # Separate connect/read timeouts
+            response = self._session.get(url, params=params, timeout=(3.05, 10))
             
             if response.status_code == 200:
                 data = response.json()
                 return data.get('data', {}).get('content', '')
             return None
         except requests.RequestException as e:
-            print(f"Network error fetching verse: {e}")
+            log.error("Network error fetching verse: %s", e)
             return None
     
-    def _fetch_fallback(self, book: str, chapter: int, start_verse: int, end_verse: int) -> str:
-        """Fallback when API is not available - return formatted reference"""
-        if start_verse == end_verse:
-            reference = f"{book} {chapter}:{start_verse}"
-        else:
-            reference = f"{book} {chapter}:{start_verse}-{end_verse}"
-        
-        # Return a placeholder that can be replaced with actual verses
-        return f"[{reference}] Please configure BIBLE_API_KEY to fetch actual verse text from API.Bible"
-    
     def _get_book_id(self, book_name: str) -> Optional[str]:
         """Convert book name to API.Bible book ID"""
-        # Simplified mapping - extend as needed
-        book_mapping = {
-            # Old Testament
-            'genesis': 'GEN', 'gen': 'GEN',
-            'exodus': 'EXO', 'exo': 'EXO', 
-            'leviticus': 'LEV', 'lev': 'LEV',
-            'numbers': 'NUM', 'num': 'NUM',
-            'deuteronomy': 'DEU', 'deu': 'DEU',
-            'joshua': 'JOS', 'jos': 'JOS',
-            'judges': 'JDG', 'jdg': 'JDG',
-            'ruth': 'RUT', 'rut': 'RUT',
-            '1 samuel': '1SA', '1sa': '1SA', '1 sam': '1SA',
-            '2 samuel': '2SA', '2sa': '2SA', '2 sam': '2SA',
-            '1 kings': '1KI', '1ki': '1KI', '1 kg': '1KI',
-            '2 kings': '2KI', '2ki': '2KI', '2 kg': '2KI',
-            'psalms': 'PSA', 'psa': 'PSA', 'psalm': 'PSA',
-            'proverbs': 'PRO', 'pro': 'PRO',
-            'isaiah': 'ISA', 'isa': 'ISA',
-            'jeremiah': 'JER', 'jer': 'JER',
-            # New Testament
-            'matthew': 'MAT', 'mat': 'MAT', 'matt': 'MAT',
-            'mark': 'MRK', 'mrk': 'MRK',
-            'luke': 'LUK', 'luk': 'LUK',
-            'john': 'JHN', 'jhn': 'JHN',
-            'acts': 'ACT', 'act': 'ACT',
-            'romans': 'ROM', 'rom': 'ROM',
-            '1 corinthians': '1CO', '1co': '1CO', '1 cor': '1CO',
-            '2 corinthians': '2CO', '2co': '2CO', '2 cor': '2CO',
-            'galatians': 'GAL', 'gal': 'GAL',
-            'ephesians': 'EPH', 'eph': 'EPH',
-            'philippians': 'PHP', 'php': 'PHP',
-            'colossians': 'COL', 'col': 'COL',
-            '1 thessalonians': '1TH', '1th': '1TH', '1 thess': '1TH',
-            '2 thessalonians': '2TH', '2th': '2TH', '2 thess': '2TH',
-            '1 timothy': '1TI', '1ti': '1TI', '1 tim': '1TI',
-            '2 timothy': '2TI', '2ti': '2TI', '2 tim': '2TI',
-            'titus': 'TIT', 'tit': 'TIT',
-            'hebrews': 'HEB', 'heb': 'HEB',
-            'james': 'JAS', 'jas': 'JAS',
-            '1 peter': '1PE', '1pe': '1PE', '1 pet': '1PE',
-            '2 peter': '2PE', '2pe': '2PE', '2 pet': '2PE',
-            '1 john': '1JN', '1jn': '1JN',
-            '2 john': '2JN', '2jn': '2JN',
-            '3 john': '3JN', '3jn': '3JN',
-            'jude': 'JUD', 'jud': 'JUD',
-            'revelation': 'REV', 'rev': 'REV',
-        }
-        return book_mapping.get(book_name.lower())
+        return _CANONICAL_TO_ID.get(book_name) or _BOOK_ID_MAP.get(book_name.casefold())
     
-    def get_book_list(self) -> List[str]:
+    def get_book_list(self) -> Tuple[str, ...]:
         """Return list of available books"""
-        return [
-            "Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy",
-            "Joshua", "Judges", "Ruth", "1 Samuel", "2 Samuel",
-            "1 Kings", "2 Kings", "Psalms", "Proverbs", "Isaiah", "Jeremiah",
-            "Matthew", "Mark", "Luke", "John", "Acts", "Romans",
-            "1 Corinthians", "2 Corinthians", "Galatians", "Ephesians",
-            "Philippians", "Colossians", "1 Thessalonians", "2 Thessalonians",
-            "1 Timothy", "2 Timothy", "Titus", "Hebrews", "James",
-            "1 Peter", "2 Peter", "1 John", "2 John", "3 John", "Jude", "Revelation"
-        ]
+        return _BOOK_LIST
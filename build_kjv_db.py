@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Build the bundled KJV database used by BibleVerseService
+Run once during the build: python build_kjv_db.py path/to/kjv.csv
+The source may also be an http(s) URL; bin/post_compile runs this on deploy
+with the KJV_CSV config var.
+
+The CSV must have a header row with book, chapter, verse and text columns.
+Book may be a name or abbreviation (e.g., "John", "1 Cor") or an API.Bible
+book ID (e.g., "JHN").
+"""
+import csv
+import io
+import sqlite3
+import sys
+import urllib.request
+
+from bible_service import KJV_DB_PATH, BibleVerseService
+
+def _open_source(source: str):
+    """Open a local CSV path or an http(s) URL as text"""
+    if source.startswith(('http://', 'https://')):
+        response = urllib.request.urlopen(source, timeout=60)
+        return io.TextIOWrapper(response, encoding='utf-8', newline='')
+    return open(source, newline='', encoding='utf-8')
+
+def build(csv_path: str):
+    """Load the CSV (a path or URL) into a fresh verses table"""
+    bible = BibleVerseService()
+    rows = []
+    skipped = set()
+
+    with _open_source(csv_path) as f:
+        for record in csv.DictReader(f):
+            book = record['book'].strip()
+            book_id = bible._get_book_id(book) or (book if book.isupper() else None)
+            if not book_id:
+                skipped.add(book)
+                continue
+            rows.append((book_id, int(record['chapter']), int(record['verse']), record['text'].strip()))
+
+    KJV_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    if KJV_DB_PATH.exists():
+        KJV_DB_PATH.unlink()
+
+    conn = sqlite3.connect(KJV_DB_PATH)
+    with conn:
+        conn.execute('''
+            CREATE TABLE verses (
+                book_id TEXT NOT NULL,
+                chapter INTEGER NOT NULL,
+                verse INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (book_id, chapter, verse)
+            ) WITHOUT ROWID
+        ''')
+        conn.executemany('INSERT INTO verses VALUES (?, ?, ?, ?)', rows)
+    conn.execute('VACUUM')
+    conn.close()
+
+    print(f"✅ Wrote {len(rows)} verses to {KJV_DB_PATH}")
+    if skipped:
+        print(f"⚠️  Skipped unknown books: {', '.join(sorted(skipped))}")
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Usage: python build_kjv_db.py path/to/kjv.csv|URL")
+        sys.exit(1)
+    build(sys.argv[1])
@@ -3,82 +3,393 @@ Simple conversation storage using SQLite
 """
 import sqlite3
 import json
-from datetime import datetime
-from typing import List, Dict, Optional
+import hashlib
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Iterator
 import os
 
+# Connection tuning, applied once per connection: WAL so readers never block the writer,
+# one fsync per commit, wait up to 5s on a locked database, in-memory temp tables,
+# a 64MB page cache and up to 256MB of memory-mapped reads.
+# WAL needs shared memory, so the database must live on a local filesystem (not NFS/SMB).
+_CONNECTION_PRAGMAS = (
+    'journal_mode=WAL',
+    'synchronous=NORMAL',
+    'busy_timeout=5000',
+    'temp_store=MEMORY',
+    'cache_size=-64000',
+    'mmap_size=268435456',
+)
+
+# How long get_state trusts its in-process copy of a value. Writes from this process update
+# the copy immediately; the TTL bounds staleness from other processes (scheduler, webhook).
+_STATE_CACHE_TTL = 1.0
+
+class _ThreadConnection:
+    """One thread's connection and lock, held in that thread's local state"""
+    __slots__ = ('conn', 'lock', 'close', '__weakref__')
+    
+    def __init__(self, conn: sqlite3.Connection, close):
+        self.conn = conn
+        self.lock = threading.RLock()
+        # The thread-local state is dropped when its thread exits, which runs this;
+        # close_thread_connection() runs it early. It only ever runs once.
+        self.close = weakref.finalize(self, close, conn)
+
 class ConversationStore:
-    def __init__(self, db_path: str = 'conversations.db'):
+    # Statements kept as constants so each call passes the same SQL text and hits the
+    # connection's prepared statement cache instead of being parsed again
+    _SQL_ADD_MESSAGE = '''
+        INSERT INTO messages (phone_number, direction, message_text, message_sid)
+        VALUES (?, ?, ?, ?)
+    '''
+    _SQL_ADD_MESSAGE_AT = '''
+        INSERT INTO messages (phone_number, direction, message_text, message_sid, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+    '''
+    # IDs increase in the order messages are stored, so they double as the
+    # chronological order and the newest rows come straight off idx_messages_phone_id.
+    # Replies that failed to send are kept for the record but are not conversation
+    _SQL_GET_HISTORY = '''
+        SELECT direction, message_text AS message, timestamp FROM (
+            SELECT id, direction, message_text, timestamp
+            FROM messages 
+            WHERE phone_number = ? AND direction != 'failed'
+            ORDER BY id DESC
+            LIMIT ?
+        )
+        ORDER BY id
+    '''
+    _SQL_GET_LATEST_ID = 'SELECT MAX(id) FROM messages WHERE phone_number = ?'
+    _SQL_GET_LATEST_ID_BEFORE = 'SELECT MAX(id) FROM messages WHERE phone_number = ? AND id < ?'
+    # Newest first; reversed in Python
+    _SQL_GET_OPENAI_HISTORY = '''
+        SELECT CASE direction WHEN 'outgoing' THEN 'assistant' ELSE 'user' END AS role,
+               message_text
+        FROM messages
+        WHERE phone_number = ? AND direction != 'failed'
+        ORDER BY id DESC
+        LIMIT ?
+    '''
+    _SQL_ADD_SCHEDULED = '''
+        INSERT INTO scheduled_messages 
+        (book, chapter, start_verse, end_verse, schedule_time, include_reflection, recipient_number, channel)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    _SQL_GET_PENDING = '''
+        SELECT id, book, chapter, start_verse, end_verse, schedule_time, 
+               include_reflection, recipient_number, channel
+        FROM scheduled_messages
+        WHERE status = 'pending'
+        ORDER BY schedule_time
+    '''
+    _SQL_GET_DUE = '''
+        SELECT id, book, chapter, start_verse, end_verse, schedule_time, 
+               include_reflection, recipient_number, channel
+        FROM scheduled_messages
+        WHERE status = 'pending' AND schedule_time = ?
+    '''
+    _SQL_GET_SCHEDULE_MARKER = "SELECT COUNT(*), MAX(id) FROM scheduled_messages WHERE status = 'pending'"
+    _SQL_MARK_SENT = "UPDATE scheduled_messages SET status = 'sent' WHERE id = ?"
+    _SQL_DELETE_SCHEDULED = 'DELETE FROM scheduled_messages WHERE id = ?'
+    _SQL_SAVE_STATE = '''
+        INSERT INTO user_state (key, value, updated_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(key) DO UPDATE SET 
+            value = excluded.value,
+            updated_at = CURRENT_TIMESTAMP
+    '''
+    _SQL_ADD_PLAN_ITEM = '''
+        INSERT INTO reading_plan (book, chapter, start_verse, end_verse, include_reflection)
+        VALUES (?, ?, ?, ?, ?)
+    '''
+    _SQL_GET_PLAN = '''
+        SELECT id, book, chapter, start_verse, end_verse, include_reflection
+        FROM reading_plan
+        ORDER BY id
+    '''
+    _SQL_DELETE_PLAN_ITEM = 'DELETE FROM reading_plan WHERE id = ?'
+    _SQL_GET_STATE = 'SELECT value FROM user_state WHERE key = ?'
+    
+    _VERSE_SELECTION_KEYS = ('last_book', 'last_chapter', 'last_start_verse', 'last_end_verse',
+                             'preview_message', 'current_verse_ref')
+    
+    def __init__(self, db_path: str = 'conversations.db', per_thread: bool = False):
+        """
+        Open the store
+        
+        Args:
+            db_path: Path to the SQLite database file
+            per_thread: Give each thread its own connection (for multi-threaded servers
+                such as the webhook) instead of sharing one connection behind a lock.
+                A thread's connection is closed when the thread exits or calls
+                close_thread_connection()
+        """
         self.db_path = db_path
+        self._per_thread = per_thread
+        self._local = threading.local()
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+        
+        # key -> (value or None if missing, expiry time) for get_state
+        self._state_cache = {}
+        self._state_cache_lock = threading.Lock()
+        
+        # By default one long-lived connection is shared by all threads (Streamlit
+        # background writes, scheduler); the lock serializes access to it
+        if not per_thread:
+            self._shared_conn = self._connect()
+            self._shared_lock = threading.RLock()
+        
         self._init_db()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a tuned connection in autocommit mode; writes use explicit transactions"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                               cached_statements=256)
+        # Rows index by column name, so results become dicts without per-column literals
+        conn.row_factory = sqlite3.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(f'PRAGMA {pragma}')
+        with self._connections_lock:
+            self._connections.add(conn)
+        return conn
+    
+    def _release(self, conn: sqlite3.Connection):
+        """Close a connection and stop tracking it"""
+        with self._connections_lock:
+            self._connections.discard(conn)
+        conn.close()
+    
+    def _thread_state(self) -> _ThreadConnection:
+        """The calling thread's connection and lock, opened on first use"""
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            state = self._local.state = _ThreadConnection(self._connect(), self._release)
+        return state
+    
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The connection for the calling thread"""
+        if not self._per_thread:
+            return self._shared_conn
+        return self._thread_state().conn
+    
+    @property
+    def _lock(self) -> threading.RLock:
+        """The lock guarding the calling thread's connection"""
+        if not self._per_thread:
+            return self._shared_lock
+        return self._thread_state().lock
+    
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed writes in one transaction, rolling back on error"""
+        with self._lock:
+            conn = self._conn
+            # Nested inside transaction(): the outer block commits or rolls back
+            if conn.in_transaction:
+                yield conn.cursor()
+                return
+            # Take the write lock up front; a deferred transaction that upgrades to a
+            # write can fail with SQLITE_BUSY when another process holds the lock
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn.cursor()
+                conn.execute('COMMIT')
+            except BaseException:
+                # Also covers a failed COMMIT (busy checkpoint, full disk); without the
+                # rollback the connection would stay in_transaction and every later
+                # write would join this dead transaction instead of committing
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group several store calls into a single transaction (one commit)
+        
+        The calling thread holds the connection for the whole block, and every
+        write made through the store inside it commits or rolls back together.
+        
+        Example:
+            with store.transaction():
+                store.mark_scheduled_messages_sent(ids)
+                store.add_messages(rows)
+        """
+        with self._transaction():
+            yield
+    
+    def close_thread_connection(self):
+        """
+        Close the calling thread's connection (per-thread stores only)
+        
+        Call when a thread's unit of work ends, e.g. at the end of each request;
+        the next store call on the thread opens a fresh connection.
+        """
+        if not self._per_thread:
+            return
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            return
+        del self._local.state
+        with state.lock:
+            state.close()
+    
+    def close(self):
+        """Close every connection opened by this store"""
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+    
     def _init_db(self):
         """Initialize the database schema"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create messages table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                phone_number TEXT NOT NULL,
-                direction TEXT NOT NULL,
-                message_text TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                message_sid TEXT
-            )
-        ''')
-        
-        # Create scheduled_messages table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS scheduled_messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                book TEXT NOT NULL,
-                chapter INTEGER NOT NULL,
-                start_verse INTEGER NOT NULL,
-                end_verse INTEGER NOT NULL,
-                schedule_time TEXT NOT NULL,
-                include_reflection INTEGER DEFAULT 1,
-                recipient_number TEXT NOT NULL,
-                status TEXT DEFAULT 'pending',
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create user_state table for persisting UI state
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_state (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                key TEXT NOT NULL UNIQUE,
-                value TEXT,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            # Create messages table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    phone_number TEXT NOT NULL,
+                    direction TEXT NOT NULL,
+                    message_text TEXT NOT NULL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    message_sid TEXT
+                )
+            ''')
+            
+            # Create scheduled_messages table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS scheduled_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    book TEXT NOT NULL,
+                    chapter INTEGER NOT NULL,
+                    start_verse INTEGER NOT NULL,
+                    end_verse INTEGER NOT NULL,
+                    schedule_time TEXT NOT NULL,
+                    include_reflection INTEGER DEFAULT 1,
+                    recipient_number TEXT NOT NULL,
+                    channel TEXT DEFAULT 'whatsapp',
+                    status TEXT DEFAULT 'pending',
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Create reading_plan table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS reading_plan (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    book TEXT NOT NULL,
+                    chapter INTEGER NOT NULL,
+                    start_verse INTEGER NOT NULL,
+                    end_verse INTEGER NOT NULL,
+                    include_reflection INTEGER DEFAULT 1,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Databases from before per-message channels were all WhatsApp
+            columns = {row['name'] for row in cursor.execute('PRAGMA table_info(scheduled_messages)')}
+            if 'channel' not in columns:
+                cursor.execute("ALTER TABLE scheduled_messages ADD COLUMN channel TEXT DEFAULT 'whatsapp'")
+            
+            # Move reading plan items stored as sentinel rows in scheduled_messages by
+            # earlier versions into their own table
+            cursor.execute('''
+                INSERT INTO reading_plan (book, chapter, start_verse, end_verse, include_reflection, created_at)
+                SELECT book, chapter, start_verse, end_verse, include_reflection, created_at
+                FROM scheduled_messages
+                WHERE recipient_number = 'reading_plan' AND status = 'pending'
+                ORDER BY id
+            ''')
+            cursor.execute("DELETE FROM scheduled_messages WHERE recipient_number = 'reading_plan'")
+            
+            # Create user_state table for persisting UI state
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_state (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT NOT NULL UNIQUE,
+                    value TEXT,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Indexes for the history lookup (newest messages per number, no sort) and
+            # the pending-schedule scan. History is ordered by id, which replaced the
+            # earlier timestamp index
+            cursor.execute('DROP INDEX IF EXISTS idx_messages_phone_ts')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_messages_phone_id
+                ON messages (phone_number, id DESC)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_sched_status_time
+                ON scheduled_messages (status, schedule_time)
+            ''')
     
     def add_message(self, phone_number: str, direction: str, message_text: str, 
-                   message_sid: Optional[str] = None):
+                   message_sid: Optional[str] = None) -> int:
         """
         Add a message to the conversation history
         
         Args:
             phone_number: The phone number
-            direction: 'incoming' or 'outgoing'
+            direction: 'incoming', 'outgoing', or 'failed' for a reply that could not
+                be sent (kept for the record, left out of conversation history)
             message_text: The message content
             message_sid: Twilio message SID (optional)
+        
+        Returns:
+            The new message's ID
+        """
+        with self._transaction() as cursor:
+            cursor.execute(self._SQL_ADD_MESSAGE, (phone_number, direction, message_text, message_sid))
+            return cursor.lastrowid
+    
+    def add_messages(self, rows: List[tuple], timestamp: Optional[str] = None):
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        Add several messages to the conversation history in one transaction
         
-        cursor.execute('''
-            INSERT INTO messages (phone_number, direction, message_text, message_sid)
-            VALUES (?, ?, ?, ?)
-        ''', (phone_number, direction, message_text, message_sid))
+        Args:
+            rows: List of (phone_number, direction, message_text, message_sid) tuples
+            timestamp: UTC timestamp for every row in the batch, in SQLite's
+                'YYYY-MM-DD HH:MM:SS' format (defaults to now)
+        """
+        # Computed once per batch rather than CURRENT_TIMESTAMP per row; same format and
+        # timezone as the column default so old and new rows sort together
+        if timestamp is None:
+            timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._transaction() as cursor:
+            cursor.executemany(self._SQL_ADD_MESSAGE_AT, [(*row, timestamp) for row in rows])
+    
+    def iter_conversation_history(self, phone_number: str, limit: int = 10,
+                                  batch_size: int = 256) -> Iterator[sqlite3.Row]:
+        """
+        Stream recent conversation history for a phone number in chronological order
         
-        conn.commit()
-        conn.close()
+        Args:
+            phone_number: The phone number
+            limit: Maximum number of messages to retrieve
+            batch_size: Rows fetched from SQLite at a time
+        
+        Yields:
+            sqlite3.Row objects with direction, message and timestamp columns
+        """
+        # The lock is held per batch, not while the caller consumes rows
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute(self._SQL_GET_HISTORY, (phone_number, limit))
+            rows = cursor.fetchmany(batch_size)
+        while rows:
+            yield from rows
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
     
     def get_conversation_history(self, phone_number: str, limit: int = 10) -> List[Dict]:
         """
@@ -89,29 +400,28 @@ class ConversationStore:
             limit: Maximum number of messages to retrieve
         
         Returns:
-            List of message dictionaries
+            List of message dictionaries in chronological order
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT direction, message_text, timestamp 
-            FROM messages 
-            WHERE phone_number = ?
-            ORDER BY timestamp DESC
-            LIMIT ?
-        ''', (phone_number, limit))
+        return [dict(row) for row in self.iter_conversation_history(phone_number, limit)]
+    
+    def get_latest_message_id(self, phone_number: str, before_id: Optional[int] = None) -> Optional[int]:
+        """
+        Get the ID of the newest message for a phone number
         
-        messages = []
-        for row in cursor.fetchall():
-            messages.append({
-                'direction': row[0],
-                'message': row[1],
-                'timestamp': row[2]
-            })
+        Args:
+            phone_number: The phone number
+            before_id: Only consider messages with a lower ID than this
         
-        conn.close()
-        return list(reversed(messages))  # Return in chronological order
+        Returns:
+            The message ID, or None if there are no messages
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            if before_id is None:
+                cursor.execute(self._SQL_GET_LATEST_ID, (phone_number,))
+            else:
+                cursor.execute(self._SQL_GET_LATEST_ID_BEFORE, (phone_number, before_id))
+            return cursor.fetchone()[0]
     
     def get_conversation_for_openai(self, phone_number: str, limit: int = 6) -> List[Dict]:
         """
@@ -124,39 +434,43 @@ class ConversationStore:
         Returns:
             List of message dicts with 'role' and 'content'
         """
-        history = self.get_conversation_history(phone_number, limit)
-        
-        openai_messages = []
-        for msg in history:
-            role = "assistant" if msg['direction'] == 'outgoing' else "user"
-            openai_messages.append({
-                "role": role,
-                "content": msg['message']
-            })
-        
-        return openai_messages
+        # Roles come straight from SQL; the newest-first rows are reversed into chronological order
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute(self._SQL_GET_OPENAI_HISTORY, (phone_number, limit))
+            rows = cursor.fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
     
     def add_scheduled_message(self, book: str, chapter: int, start_verse: int, 
                             end_verse: int, schedule_time: str, 
-                            include_reflection: bool, recipient_number: str):
-        """Add a scheduled message to the database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO scheduled_messages 
-            (book, chapter, start_verse, end_verse, schedule_time, include_reflection, recipient_number)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (book, chapter, start_verse, end_verse, schedule_time, 
-              1 if include_reflection else 0, recipient_number))
-        
-        conn.commit()
-        conn.close()
+                            include_reflection: bool, recipient_number: str,
+                            channel: str = 'whatsapp'):
+        """Add a scheduled message to the database, sent over channel ('sms' or 'whatsapp')"""
+        with self._transaction() as cursor:
+            cursor.execute(self._SQL_ADD_SCHEDULED, (book, chapter, start_verse, end_verse, schedule_time, 
+                                                     1 if include_reflection else 0, recipient_number,
+                                                     channel))
+    
+    def add_scheduled_messages(self, rows: List[tuple]):
+        """
+        Add several scheduled messages in one transaction
+        
+        Args:
+            rows: List of (book, chapter, start_verse, end_verse, schedule_time,
+                include_reflection, recipient_number[, channel]) tuples; channel
+                defaults to 'whatsapp'
+        """
+        with self._transaction() as cursor:
+            cursor.executemany(self._SQL_ADD_SCHEDULED, [
+                (book, chapter, start_verse, end_verse, schedule_time,
+                 1 if include_reflection else 0, recipient_number, channel[0] if channel else 'whatsapp')
+                for book, chapter, start_verse, end_verse, schedule_time, include_reflection, recipient_number, *channel in rows
+            ])
     
     def add_reading_plan_item(self, book: str, chapter: int, start_verse: int, 
                             end_verse: int, include_reflection: bool):
         """
-        Add an item to the reading plan (uses scheduled_messages table for storage)
+        Add an item to the reading plan
         
         Args:
             book: Bible book name
@@ -165,70 +479,81 @@ class ConversationStore:
             end_verse: Ending verse number
             include_reflection: Whether to include AI reflection
         """
-        # Use the existing scheduled_messages table with dummy values for time/recipient
-        # since we're repurposing it as a reading plan
-        self.add_scheduled_message(
-            book=book,
-            chapter=chapter,
-            start_verse=start_verse,
-            end_verse=end_verse,
-            schedule_time="00:00",  # Not used for reading plans
-            include_reflection=include_reflection,
-            recipient_number="reading_plan"  # Marker for reading plan items
-        )
+        with self._transaction() as cursor:
+            cursor.execute(self._SQL_ADD_PLAN_ITEM, (book, chapter, start_verse, end_verse,
+                                                     1 if include_reflection else 0))
+    
+    def get_reading_plan(self) -> List[Dict]:
+        """Get all reading plan items in the order they were added"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute(self._SQL_GET_PLAN)
+            items = [dict(row) for row in cursor.fetchall()]
+        
+        for item in items:
+            item['include_reflection'] = bool(item['include_reflection'])
+        return items
+    
+    def delete_reading_plan_item(self, item_id: int):
+        """Delete an item from the reading plan"""
+        with self._transaction() as cursor:
+            cursor.execute(self._SQL_DELETE_PLAN_ITEM, (item_id,))
+    
+    def _scheduled_rows(self, sql: str, params: tuple = ()) -> List[Dict]:
+        """Run a scheduled_messages query and return its rows as dicts"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            
+            cursor.execute(sql, params)
+            messages = [dict(row) for row in cursor.fetchall()]
+        
+        for msg in messages:
+            msg['include_reflection'] = bool(msg['include_reflection'])
+        return messages
     
     def get_pending_scheduled_messages(self) -> List[Dict]:
         """Get all pending scheduled messages"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, book, chapter, start_verse, end_verse, schedule_time, 
-                   include_reflection, recipient_number
-            FROM scheduled_messages
-            WHERE status = 'pending'
-            ORDER BY schedule_time
-        ''')
-        
-        messages = []
-        for row in cursor.fetchall():
-            messages.append({
-                'id': row[0],
-                'book': row[1],
-                'chapter': row[2],
-                'start_verse': row[3],
-                'end_verse': row[4],
-                'schedule_time': row[5],
-                'include_reflection': bool(row[6]),
-                'recipient_number': row[7]
-            })
+        return self._scheduled_rows(self._SQL_GET_PENDING)
+    
+    def get_schedule_marker(self) -> tuple:
+        """
+        Cheap fingerprint of the pending schedule, served from idx_sched_status_time
         
-        conn.close()
-        return messages
+        Returns:
+            (count, highest ID) of pending rows; it changes whenever a scheduled message
+            is added, sent or deleted
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute(self._SQL_GET_SCHEDULE_MARKER)
+            return tuple(cursor.fetchone())
     
-    def mark_scheduled_message_sent(self, message_id: int):
-        """Mark a scheduled message as sent"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_due_scheduled_messages(self, schedule_time: str) -> List[Dict]:
+        """
+        Get the pending scheduled messages for one schedule time
         
-        cursor.execute('''
-            UPDATE scheduled_messages 
-            SET status = 'sent'
-            WHERE id = ?
-        ''', (message_id,))
+        Args:
+            schedule_time: Time of day in HH:MM format
         
-        conn.commit()
-        conn.close()
+        Returns:
+            List of scheduled message dictionaries
+        """
+        return self._scheduled_rows(self._SQL_GET_DUE, (schedule_time,))
+    
+    def mark_scheduled_message_sent(self, message_id: int):
+        """Mark a scheduled message as sent"""
+        with self._transaction() as cursor:
+            cursor.execute(self._SQL_MARK_SENT, (message_id,))
+    
+    def mark_scheduled_messages_sent(self, message_ids: List[int]):
+        """Mark several scheduled messages as sent in one transaction"""
+        with self._transaction() as cursor:
+            cursor.executemany(self._SQL_MARK_SENT, [(message_id,) for message_id in message_ids])
     
     def delete_scheduled_message(self, message_id: int):
         """Delete a scheduled message"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM scheduled_messages WHERE id = ?', (message_id,))
-        
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            cursor.execute(self._SQL_DELETE_SCHEDULED, (message_id,))
     
     def save_state(self, key: str, value: str):
         """
@@ -238,19 +563,40 @@ class ConversationStore:
             key: The state key (e.g., 'last_book', 'preview_message')
             value: The value to store (will be converted to string)
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO user_state (key, value, updated_at)
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-            ON CONFLICT(key) DO UPDATE SET 
-                value = excluded.value,
-                updated_at = CURRENT_TIMESTAMP
-        ''', (key, value))
+        # UI saves often repeat the stored value; a read is much cheaper than a write
+        # transaction, so skip the upsert when nothing changed
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute(self._SQL_GET_STATE, (key,))
+            row = cursor.fetchone()
+        
+        if row is None or row[0] != value:
+            with self._transaction() as cursor:
+                cursor.execute(self._SQL_SAVE_STATE, (key, value))
+        self._cache_states({key: value})
+    
+    def save_states(self, items: Dict[str, str]):
+        """
+        Save several state values in one transaction
         
-        conn.commit()
-        conn.close()
+        Args:
+            items: Mapping of state keys to values
+        """
+        # Only write the values that differ from what is stored
+        stored = self.get_states(list(items))
+        changed = [(key, value) for key, value in items.items() if stored.get(key) != value]
+        
+        if changed:
+            with self._transaction() as cursor:
+                cursor.executemany(self._SQL_SAVE_STATE, changed)
+        self._cache_states(items)
+    
+    def _cache_states(self, items: Dict[str, Optional[str]]):
+        """Remember state values for get_state until the cache TTL runs out"""
+        expires = time.monotonic() + _STATE_CACHE_TTL
+        with self._state_cache_lock:
+            for key, value in items.items():
+                self._state_cache[key] = (value, expires)
     
     def get_state(self, key: str, default: Optional[str] = None) -> Optional[str]:
         """
@@ -263,15 +609,38 @@ class ConversationStore:
         Returns:
             The stored value or default if not found
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT value FROM user_state WHERE key = ?', (key,))
-        row = cursor.fetchone()
+        with self._state_cache_lock:
+            cached = self._state_cache.get(key)
+        if cached and cached[1] > time.monotonic():
+            value = cached[0]
+        else:
+            with self._lock:
+                cursor = self._conn.cursor()
+                
+                cursor.execute(self._SQL_GET_STATE, (key,))
+                row = cursor.fetchone()
+            value = row[0] if row else None
+            self._cache_states({key: value})
+        
+        return default if value is None else value
+    
+    def get_states(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Retrieve several state values with a single query
         
-        conn.close()
+        Args:
+            keys: The state keys to retrieve
         
-        return row[0] if row else default
+        Returns:
+            Dict of the keys that exist mapped to their stored values
+        """
+        if not keys:
+            return {}
+        placeholders = ', '.join('?' * len(keys))
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute(f'SELECT key, value FROM user_state WHERE key IN ({placeholders})', list(keys))
+            return {row['key']: row['value'] for row in cursor.fetchall()}
     
     def save_verse_selection(self, book: str, chapter: int, start_verse: int, 
                            end_verse: int, preview_message: Optional[str] = None,
@@ -287,16 +656,20 @@ class ConversationStore:
             preview_message: Optional preview message text
             verse_ref: Optional verse reference string
         """
-        self.save_state('last_book', book)
-        self.save_state('last_chapter', str(chapter))
-        self.save_state('last_start_verse', str(start_verse))
-        self.save_state('last_end_verse', str(end_verse))
+        items = {
+            'last_book': book,
+            'last_chapter': str(chapter),
+            'last_start_verse': str(start_verse),
+            'last_end_verse': str(end_verse),
+        }
         
         if preview_message:
-            self.save_state('preview_message', preview_message)
+            items['preview_message'] = preview_message
         
         if verse_ref:
-            self.save_state('current_verse_ref', verse_ref)
+            items['current_verse_ref'] = verse_ref
+        
+        self.save_states(items)
     
     def get_verse_selection(self) -> Dict:
         """
@@ -305,18 +678,20 @@ class ConversationStore:
         Returns:
             Dictionary with last verse selection or defaults
         """
+        state = self.get_states(self._VERSE_SELECTION_KEYS)
+        
         # Get values with defaults to avoid None
-        chapter_str = self.get_state('last_chapter', '3')
-        start_str = self.get_state('last_start_verse', '16')
-        end_str = self.get_state('last_end_verse', '16')
+        chapter_str = state.get('last_chapter')
+        start_str = state.get('last_start_verse')
+        end_str = state.get('last_end_verse')
         
         return {
-            'book': self.get_state('last_book'),
+            'book': state.get('last_book'),
             'chapter': int(chapter_str) if chapter_str else 3,
             'start_verse': int(start_str) if start_str else 16,
             'end_verse': int(end_str) if end_str else 16,
-            'preview_message': self.get_state('preview_message'),
-            'current_verse_ref': self.get_state('current_verse_ref')
+            'preview_message': state.get('preview_message'),
+            'current_verse_ref': state.get('current_verse_ref')
         }
     
     def save_recipient_number(self, phone_number: str):
@@ -336,3 +711,37 @@ class ConversationStore:
             The saved phone number or None
         """
         return self.get_state('recipient_number')
+    
+    @staticmethod
+    def _reflection_key(verse_ref: str, verse_text: str, doctrine_fingerprint: str) -> str:
+        """user_state key for a reflection; includes the text so a changed source is a miss"""
+        text_digest = hashlib.sha256(verse_text.encode()).hexdigest()[:16]
+        return f'reflection:{doctrine_fingerprint}:{text_digest}:{verse_ref}'
+    
+    def save_reflection(self, verse_ref: str, verse_text: str, message: str,
+                        doctrine_fingerprint: str = ''):
+        """
+        Save a generated reflection message for a verse
+        
+        Args:
+            verse_ref: The verse reference string (e.g., 'John 3:16')
+            verse_text: The verse text the reflection was written about
+            message: The formatted message with reflection
+            doctrine_fingerprint: Identifies the doctrine the reflection was written for
+        """
+        self.save_state(self._reflection_key(verse_ref, verse_text, doctrine_fingerprint), message)
+    
+    def get_reflection(self, verse_ref: str, verse_text: str,
+                       doctrine_fingerprint: str = '') -> Optional[str]:
+        """
+        Retrieve a saved reflection message for a verse
+        
+        Args:
+            verse_ref: The verse reference string
+            verse_text: The verse text the reflection must have been written about
+            doctrine_fingerprint: Identifies the doctrine the reflection was written for
+        
+        Returns:
+            The saved message or None
+        """
+        return self.get_state(self._reflection_key(verse_ref, verse_text, doctrine_fingerprint))
@@ -0,0 +1,44 @@
+"""
+Logging setup for the scheduler and webhook processes
+Records are queued by the logging thread and written by a background listener,
+so request and send paths never block on console output
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+_LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+_LOG_FORMAT = '[%(asctime)s] %(levelname)s %(name)s: %(message)s'
+
+_listener = None
+_listener_lock = threading.Lock()
+
+def configure_logging(level: str = _LOG_LEVEL):
+    """
+    Send the root logger's records through a queue to a console writer thread
+    
+    Safe to call more than once; only the first call installs the handlers.
+    
+    Args:
+        level: Minimum level to log (defaults to LOG_LEVEL, or INFO)
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        
+        log_queue = queue.SimpleQueue()
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(_LOG_FORMAT))
+        
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        
+        _listener = logging.handlers.QueueListener(log_queue, console)
+        _listener.start()
+        # Flush whatever is still queued when the process exits
+        atexit.register(_listener.stop)
@@ -2,20 +2,266 @@
 OpenAI service for formatting verses and answering questions
 """
 import os
-from typing import Optional
+import logging
+import json
+import hashlib
+import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Iterator
+import numpy as np
 from openai import OpenAI
-from dotenv import load_dotenv
 
-load_dotenv()
+log = logging.getLogger(__name__)
+
+# Read once at import; entry points load .env before importing this module
+_API_KEY = os.getenv('OPENAI_API_KEY')
+_CHURCH_DOCTRINE = os.getenv('CHURCH_DOCTRINE',
+    'Protestant Christian perspective with emphasis on grace, faith, and scripture')
+
+# Static instructions and examples for verse formatting. Kept byte-identical between calls
+# (dynamic verse content goes in the user message) so OpenAI's prompt caching can reuse the prefix.
+_REFLECTION_INSTRUCTIONS = """You are a helpful assistant that creates brief, meaningful Bible devotionals for SMS messages.
+
+For each Bible verse you are given, provide:
+1. The verse formatted nicely for SMS
+2. A brief, encouraging reflection (2-3 sentences) that applies the verse to daily life
+
+Keep the total message under 300 characters if possible for SMS compatibility.
+
+Example input:
+Verse Reference: Psalms 46:1
+Verse Text: God is our refuge and strength, a very present help in trouble.
+
+Example output:
+📖 Psalms 46:1
+"God is our refuge and strength, a very present help in trouble."
+
+When life feels overwhelming, God is not far off. Run to Him first today - He is your shelter and your strength. 🙏
+
+Example input:
+Verse Reference: Matthew 11:28
+Verse Text: Come unto me, all ye that labour and are heavy laden, and I will give you rest.
+
+Example output:
+📖 Matthew 11:28
+"Come unto me, all ye that labour and are heavy laden, and I will give you rest."
+
+Jesus invites you to bring Him your burdens, not carry them alone. Take a quiet moment today to rest in His presence. 🙏"""
+
+# Upper bound on conversation history sent with a question
+HISTORY_TOKEN_BUDGET = 3000
+
+# Output caps sized to what fits in an SMS. A reflection's cap is in addition to the
+# quoted verse text, which is echoed back in full (see _reflection_max_tokens)
+REFLECTION_MAX_TOKENS = 120
+ANSWER_MAX_TOKENS = 150
+# Replies never need more than one blank line; a run of them means the model is rambling
+_STOP_SEQUENCES = ["\n\n\n"]
+
+# Sent in place of an answer when OpenAI fails
+ANSWER_FALLBACK = ("I'm sorry, I'm having trouble responding right now. Please try again later "
+                   "or contact your church directly for guidance. 🙏")
+
+# Passages longer than this (e.g., whole chapters) are too long for an SMS devotional;
+# they get the plain fallback format instead of a model call
+MAX_VERSE_PROMPT_TOKENS = 400
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the gpt-4o-mini tokenizer once (None when tiktoken is unavailable)"""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model("gpt-4o-mini")
+    except Exception:
+        return None
+
+def _count_tokens(text: str) -> int:
+    """Count tokens in text, estimating about four characters per token without tiktoken"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+def _verse_prompt(verse_text: str, verse_reference: str) -> str:
+    """User message asking for one formatted verse"""
+    return f"Verse Reference: {verse_reference}\nVerse Text: {verse_text}"
+
+def fallback_message(verse_text: str, verse_reference: str) -> str:
+    """Simple formatting used when no reflection can be generated (never worth storing)"""
+    return f"📖 {verse_reference}\n\n{verse_text}\n\nMay God's word guide you today! 🙏"
+
+def _is_oversized(verse_text: str) -> bool:
+    """Whether a passage is too long to send for a reflection"""
+    return _count_tokens(verse_text) > MAX_VERSE_PROMPT_TOKENS
+
+def _reflection_max_tokens(verse_text: str) -> int:
+    """Output token cap for a formatted verse: the quoted text plus a short reflection"""
+    return _count_tokens(verse_text) + REFLECTION_MAX_TOKENS
+
+def _trim_to_budget(history: List[Dict], max_tokens: int = HISTORY_TOKEN_BUDGET) -> List[Dict]:
+    """
+    Keep the most recent messages whose combined size fits within a token budget
+    
+    Args:
+        history: Chat messages, oldest first
+        max_tokens: Maximum tokens for the kept messages
+    
+    Returns:
+        The newest messages that fit, oldest first
+    """
+    kept = []
+    total = 0
+    for message in reversed(history):
+        # Roughly 4 tokens of per-message overhead in the chat format
+        total += _count_tokens(message['content']) + 4
+        if total > max_tokens:
+            break
+        kept.append(message)
+    kept.reverse()
+    return kept
+
+class SemanticCache:
+    """
+    In-memory cache of answers keyed by question embedding similarity
+    
+    Near-duplicate questions ("what about forgiveness?" / "forgiveness?") map to the
+    same cached answer when their cosine similarity exceeds the threshold.
+    """
+    def __init__(self, threshold: float = 0.92, max_entries: int = 512):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._matrix = None  # (N, dim) array of unit-length question embeddings
+        self._answers: List[str] = []
+        self._lock = threading.Lock()
+    
+    def lookup(self, embedding: np.ndarray) -> Optional[str]:
+        """Return the cached answer for the most similar question, if similar enough"""
+        with self._lock:
+            if not self._answers:
+                return None
+            scores = self._matrix @ embedding
+            best = int(np.argmax(scores))
+            return self._answers[best] if scores[best] >= self.threshold else None
+    
+    def add(self, embedding: np.ndarray, answer: str):
+        """Store an answer, evicting the oldest entry once the cache is full"""
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = embedding[np.newaxis, :]
+            else:
+                self._matrix = np.vstack([self._matrix, embedding])
+            self._answers.append(answer)
+            if len(self._answers) > self.max_entries:
+                self._matrix = self._matrix[1:]
+                self._answers.pop(0)
+
+class ReflectionCache:
+    """
+    In-memory LRU cache of formatted verse messages with a time-to-live
+    
+    Many recipients of the same scheduled verse get an identical prompt, so the
+    first reflection generated for a verse is reused until it expires.
+    """
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> (message, expiry time)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(verse_reference: str, verse_text: str) -> tuple:
+        """Cache key for a verse"""
+        return (verse_reference, hash(verse_text))
+    
+    def get(self, key: tuple) -> Optional[str]:
+        """Return the cached message for a key, if present and not expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def put(self, key: tuple, message: str):
+        """Store a message, evicting the least recently used entry once the cache is full"""
+        with self._lock:
+            self._entries[key] = (message, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class ReflectionStream:
+    """
+    Chunks of a streamed reflection, plus whether the model's reply arrived in full
+    
+    complete becomes True only after the model's reply streamed to the end. It stays
+    False when the fallback text was sent instead or the stream broke off partway,
+    so callers can tell whether the joined chunks are safe to store.
+    """
+    
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self.complete = False
+    
+    def __iter__(self) -> Iterator[str]:
+        # The chunk generator returns whether it finished with model output
+        self.complete = yield from self._chunks
 
 class OpenAIService:
+    ANSWER_FALLBACK = ANSWER_FALLBACK
+    
     def __init__(self):
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
+        if not _API_KEY:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
-        self.client = OpenAI(api_key=api_key)
-        self.church_doctrine = os.getenv('CHURCH_DOCTRINE', 
-            'Protestant Christian perspective with emphasis on grace, faith, and scripture')
+        # The SDK retries connection errors, timeouts, 429 and 5xx with exponential
+        # backoff and honors Retry-After; 2 retries gives 3 attempts per request
+        self.client = OpenAI(api_key=_API_KEY, max_retries=2, timeout=30.0)
+        # The Batch API (client.batches, purpose="batch" files) needs openai>=1.16.0;
+        # checked once here so an older install is reported once, not every interval
+        self.supports_batch = hasattr(self.client, 'batches')
+        if not self.supports_batch:
+            log.warning("Installed openai package has no Batch API (needs openai>=1.16.0); "
+                        "reflections will only be written at send time")
+        self.church_doctrine = _CHURCH_DOCTRINE
+        # Identifies the doctrine reflections were written for, so stored ones are
+        # not reused after CHURCH_DOCTRINE changes
+        self.doctrine_fingerprint = hashlib.sha256(self.church_doctrine.encode()).hexdigest()[:16]
+        
+        # System prompts are built once so every request shares an identical, cacheable prefix
+        self._reflection_system_prompt = (
+            f"{_REFLECTION_INSTRUCTIONS}\n\n"
+            f"Write reflections from this doctrinal perspective: {self.church_doctrine}"
+        )
+        self._qa_system_prompt = f"""You are a knowledgeable Bible assistant answering questions from this doctrinal perspective: {self.church_doctrine}
+
+Guidelines:
+- Provide brief, clear answers suitable for SMS (keep under 400 characters when possible)
+- Reference specific Bible verses when relevant
+- Be warm, encouraging, and pastoral in tone
+- If unsure, acknowledge limitations humbly
+- Stay true to the doctrinal perspective provided"""
+        # Shared message dicts for every request; never mutated
+        self._reflection_system_message = {"role": "system", "content": self._reflection_system_prompt}
+        self._qa_system_message = {"role": "system", "content": self._qa_system_prompt}
+        
+        self._answer_cache = SemanticCache()
+        self._reflection_cache = ReflectionCache()
+    
+    def _embed_question(self, question: str) -> Optional[np.ndarray]:
+        """Embed a question as a unit vector for the semantic cache (None on failure)"""
+        try:
+            response = self.client.embeddings.create(model="text-embedding-3-small", input=question)
+            embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
+            return embedding / np.linalg.norm(embedding)
+        except Exception as e:
+            log.error("Error embedding question with OpenAI: %s", e)
+            return None
         
     def format_verse_with_reflection(self, verse_text: str, verse_reference: str, 
                                      include_reflection: bool = True) -> str:
@@ -32,36 +278,305 @@ class OpenAIService:
         """
         if not include_reflection:
             return f"📖 {verse_reference}\n\n{verse_text}"
+        return (self.generate_reflection(verse_text, verse_reference)
+                or fallback_message(verse_text, verse_reference))
+    
+    def generate_reflection(self, verse_text: str, verse_reference: str) -> Optional[str]:
+        """
+        Format a Bible verse with a reflection written by the model
+        
+        Args:
+            verse_text: The actual verse text
+            verse_reference: The verse reference (e.g., "John 3:16")
+        
+        Returns:
+            The model's message, or None if none could be generated
+        """
+        cache_key = ReflectionCache.key(verse_reference, verse_text)
+        cached_message = self._reflection_cache.get(cache_key)
+        if cached_message:
+            return cached_message
+        
+        # Skip the round trip for passages too long to reflect on in an SMS
+        if _is_oversized(verse_text):
+            return None
         
         try:
-            prompt = f"""Format this Bible verse for an SMS devotional message and add a brief, meaningful reflection (2-3 sentences).
-
-Verse Reference: {verse_reference}
-Verse Text: {verse_text}
-
-Please provide:
-1. The verse formatted nicely for SMS
-2. A brief, encouraging reflection that applies the verse to daily life
-
-Keep the total message under 300 characters if possible for SMS compatibility."""
-
             response = self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": "You are a helpful assistant that creates brief, meaningful Bible devotionals for SMS messages."},
-                    {"role": "user", "content": prompt}
+                    self._reflection_system_message,
+                    {"role": "user", "content": _verse_prompt(verse_text, verse_reference)}
                 ],
-                max_tokens=250,
-                temperature=0.7
+                max_tokens=_reflection_max_tokens(verse_text),
+                temperature=0.7,
+                stop=_STOP_SEQUENCES
             )
             
             formatted_message = response.choices[0].message.content.strip()
-            return formatted_message
+            if formatted_message:
+                self._reflection_cache.put(cache_key, formatted_message)
+            return formatted_message or None
             
         except Exception as e:
-            print(f"Error formatting verse with OpenAI: {e}")
-            # Fallback to simple formatting
-            return f"📖 {verse_reference}\n\n{verse_text}\n\nMay God's word guide you today! 🙏"
+            log.error("Error formatting verse with OpenAI: %s", e)
+            return None
+    
+    def stream_verse_with_reflection(self, verse_text: str, verse_reference: str) -> ReflectionStream:
+        """
+        Stream a formatted verse with reflection as OpenAI generates it
+        
+        Args:
+            verse_text: The actual verse text
+            verse_reference: The verse reference (e.g., "John 3:16")
+        
+        Returns:
+            ReflectionStream yielding chunks of the formatted message, in order
+        """
+        return ReflectionStream(self._stream_chunks(verse_text, verse_reference))
+    
+    def _stream_chunks(self, verse_text: str, verse_reference: str) -> Iterator[str]:
+        """Generator behind stream_verse_with_reflection; returns True if the model's reply completed"""
+        if _is_oversized(verse_text):
+            yield fallback_message(verse_text, verse_reference)
+            return False
+        
+        produced = False
+        try:
+            stream = self.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    self._reflection_system_message,
+                    {"role": "user", "content": _verse_prompt(verse_text, verse_reference)}
+                ],
+                max_tokens=_reflection_max_tokens(verse_text),
+                temperature=0.7,
+                stop=_STOP_SEQUENCES,
+                stream=True
+            )
+            
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    produced = True
+                    yield chunk.choices[0].delta.content
+            return produced
+                    
+        except Exception as e:
+            log.error("Error streaming verse from OpenAI: %s", e)
+            # Fall back to simple formatting unless part of the reflection already went out
+            if not produced:
+                yield fallback_message(verse_text, verse_reference)
+            return False
+    
+    def format_verses_batch(self, items: List[Dict], batch_size: int = 8,
+                            fallback: bool = True) -> List[Optional[str]]:
+        """
+        Format several Bible verses using one OpenAI call per batch of verses
+        
+        Args:
+            items: List of dicts with 'verse_text' and 'verse_reference' keys, and
+                an optional 'include_reflection' flag (defaults to True)
+            batch_size: Maximum number of verses sent in a single request
+            fallback: Fill in fallback_message for reflections that could not be
+                generated; with False they are None, so callers can tell real model
+                output (safe to store) from a stand-in
+        
+        Returns:
+            Formatted messages in the same order as items
+        """
+        results = [None] * len(items)
+        
+        # Verses without a reflection, with one already cached, or too long for one
+        # need no model call
+        pending = []
+        for idx, item in enumerate(items):
+            if not item.get('include_reflection', True):
+                results[idx] = f"📖 {item['verse_reference']}\n\n{item['verse_text']}"
+                continue
+            if _is_oversized(item['verse_text']):
+                continue
+            results[idx] = self._reflection_cache.get(
+                ReflectionCache.key(item['verse_reference'], item['verse_text'])
+            )
+            if not results[idx]:
+                pending.append(idx)
+        
+        for i in range(0, len(pending), batch_size):
+            batch_indices = pending[i:i + batch_size]
+            batch = [items[idx] for idx in batch_indices]
+            try:
+                payload = [
+                    {"reference": item['verse_reference'], "text": item['verse_text']}
+                    for item in batch
+                ]
+                prompt = f"""Verses (JSON array):
+{json.dumps(payload, ensure_ascii=False)}
+
+Return a JSON object {{"messages": [...]}} where element i of "messages" is the formatted message for verse i."""
+
+                response = self.client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        self._reflection_system_message,
+                        {"role": "user", "content": prompt}
+                    ],
+                    # Plus a little per message for the JSON quoting around it
+                    max_tokens=sum(_reflection_max_tokens(item['verse_text']) + 20 for item in batch),
+                    temperature=0.7,
+                    response_format={"type": "json_object"}
+                )
+                
+                messages = json.loads(response.choices[0].message.content)["messages"]
+                if len(messages) != len(batch):
+                    raise ValueError(f"expected {len(batch)} messages, got {len(messages)}")
+                messages = [str(message).strip() or None for message in messages]
+                for item, message in zip(batch, messages):
+                    if message:
+                        self._reflection_cache.put(
+                            ReflectionCache.key(item['verse_reference'], item['verse_text']), message
+                        )
+                
+            except Exception as e:
+                log.error("Error formatting verse batch with OpenAI: %s", e)
+                # Fall back to formatting this batch one verse at a time
+                messages = self.format_verses_concurrently(
+                    [dict(item, include_reflection=True) for item in batch], fallback=False
+                )
+            
+            for idx, message in zip(batch_indices, messages):
+                results[idx] = message
+        
+        if fallback:
+            results = [
+                message or fallback_message(item['verse_text'], item['verse_reference'])
+                for item, message in zip(items, results)
+            ]
+        return results
+    
+    def format_verses_concurrently(self, items: List[Dict], max_workers: int = 4,
+                                   fallback: bool = True) -> List[Optional[str]]:
+        """
+        Format several verses with format_verse_with_reflection, running the calls concurrently
+        
+        Args:
+            items: List of dicts with 'verse_text', 'verse_reference' and 'include_reflection' keys
+            max_workers: Maximum number of OpenAI requests in flight (kept low for rate limits)
+            fallback: As for format_verses_batch; with False, failed reflections are None
+        
+        Returns:
+            Formatted messages in the same order as items
+        """
+        def format_item(item):
+            if item['include_reflection'] and not fallback:
+                return self.generate_reflection(item['verse_text'], item['verse_reference'])
+            return self.format_verse_with_reflection(
+                item['verse_text'], item['verse_reference'], item['include_reflection']
+            )
+        
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            return list(executor.map(format_item, items))
+    
+    def submit_reflection_batch(self, items: List[Dict]) -> Optional[str]:
+        """
+        Queue reflections for several verses as one OpenAI Batch API job
+        
+        Batch jobs cost half as much but can take up to 24 hours, so this is for
+        preparing reflections ahead of time, not for messages due now.
+        
+        Args:
+            items: List of dicts with 'verse_text' and 'verse_reference' keys
+        
+        Returns:
+            The batch ID, or None if nothing was submitted (or the Batch API is unavailable)
+        """
+        if not self.supports_batch:
+            return None
+        
+        # One request per distinct reference; the reference doubles as the custom_id.
+        # Oversized passages are left out, since they get the plain format at send time
+        unique = {
+            item['verse_reference']: item['verse_text']
+            for item in items if not _is_oversized(item['verse_text'])
+        }
+        if not unique:
+            return None
+        
+        lines = [
+            json.dumps({
+                "custom_id": verse_reference,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": "gpt-4o-mini",
+                    "messages": [
+                        self._reflection_system_message,
+                        {"role": "user", "content": _verse_prompt(verse_text, verse_reference)}
+                    ],
+                    "max_tokens": _reflection_max_tokens(verse_text),
+                    "temperature": 0.7,
+                    "stop": _STOP_SEQUENCES
+                }
+            }, ensure_ascii=False)
+            for verse_reference, verse_text in unique.items()
+        ]
+        
+        try:
+            batch_file = self.client.files.create(
+                file=("reflections.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            return batch.id
+        except Exception as e:
+            log.error("Error submitting reflection batch to OpenAI: %s", e)
+            return None
+    
+    def collect_reflection_batch(self, batch_id: str) -> Optional[Dict[str, str]]:
+        """
+        Fetch the results of a batch submitted with submit_reflection_batch
+        
+        Args:
+            batch_id: The batch ID
+        
+        Returns:
+            None while the batch is still running, otherwise a dict mapping each verse
+            reference to its formatted message. The dict is empty if the batch failed
+            or could not be read (e.g., an expired ID), so the caller moves on instead
+            of waiting on it forever.
+        """
+        try:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in ("validating", "in_progress", "finalizing"):
+                return None
+            if batch.status != "completed" or not batch.output_file_id:
+                log.warning("Reflection batch %s ended with status %s", batch_id, batch.status)
+                return {}
+            output = self.client.files.content(batch.output_file_id).text
+        except Exception as e:
+            log.error("Error collecting reflection batch %s from OpenAI: %s", batch_id, e)
+            return {}
+        
+        results = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            # A malformed line costs only its own verse
+            try:
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    content = response["body"]["choices"][0]["message"]["content"].strip()
+                    if content:
+                        results[record["custom_id"]] = content
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                log.warning("Skipping unreadable line in reflection batch %s: %s", batch_id, e)
+        return results
     
     def answer_question(self, question: str, conversation_history: Optional[list] = None) -> str:
         """
@@ -72,27 +587,26 @@ Keep the total message under 300 characters if possible for SMS compatibility.""
             conversation_history: Optional list of previous messages
         
         Returns:
-            Answer to the question
+            Answer to the question, or ANSWER_FALLBACK if OpenAI failed
         """
+        # Standalone questions can be answered from the semantic cache; with history the
+        # right answer depends on the conversation, so always ask the model
+        question_embedding = None
+        if not conversation_history:
+            question_embedding = self._embed_question(question)
+            if question_embedding is not None:
+                cached_answer = self._answer_cache.lookup(question_embedding)
+                if cached_answer:
+                    return cached_answer
+        
         try:
             # Build conversation context
-            messages = [
-                {
-                    "role": "system", 
-                    "content": f"""You are a knowledgeable Bible assistant answering questions from this doctrinal perspective: {self.church_doctrine}
-
-Guidelines:
-- Provide brief, clear answers suitable for SMS (keep under 400 characters when possible)
-- Reference specific Bible verses when relevant
-- Be warm, encouraging, and pastoral in tone
-- If unsure, acknowledge limitations humbly
-- Stay true to the doctrinal perspective provided"""
-                }
-            ]
+            messages = [self._qa_system_message]
             
             # Add conversation history if provided
             if conversation_history:
-                messages.extend(conversation_history[-6:])  # Last 3 exchanges
+                # Last 3 exchanges, dropping older ones that would exceed the token budget
+                messages.extend(_trim_to_budget(conversation_history[-6:]))
             
             # Add current question
             messages.append({"role": "user", "content": question})
@@ -100,13 +614,17 @@ Guidelines:
             response = self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=messages,
-                max_tokens=300,
-                temperature=0.7
+                max_tokens=ANSWER_MAX_TOKENS,
+                # Low temperature keeps answers consistent for the semantic cache
+                temperature=0.3,
+                stop=_STOP_SEQUENCES
             )
             
             answer = response.choices[0].message.content.strip()
+            if question_embedding is not None:
+                self._answer_cache.add(question_embedding, answer)
             return answer
             
         except Exception as e:
-            print(f"Error answering question with OpenAI: {e}")
-            return "I'm sorry, I'm having trouble responding right now. Please try again later or contact your church directly for guidance. 🙏"
+            log.error("Error answering question with OpenAI: %s", e)
+            return ANSWER_FALLBACK
@@ -2,99 +2,315 @@
 Background scheduler for sending scheduled Bible verses
 Run this separately or integrate with your deployment
 """
+import logging
 import time
-import schedule
-from datetime import datetime
-from bible_service import BibleVerseService
-from openai_service import OpenAIService
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Dict, NamedTuple
+from dotenv import load_dotenv
+
+# Load .env before the services read their settings at import
+load_dotenv()
+
+from logging_config import configure_logging
+from bible_service import BibleVerseService, format_reference
+from openai_service import OpenAIService, fallback_message
 from twilio_service import TwilioService
 from conversation_store import ConversationStore
 
-def send_scheduled_verses():
-    """Check and send any scheduled verses"""
-    print(f"[{datetime.now()}] Checking for scheduled verses...")
+log = logging.getLogger(__name__)
+
+class Services(NamedTuple):
+    """Long-lived service instances shared by every scheduler run"""
+    bible_service: BibleVerseService
+    openai_service: OpenAIService
+    twilio_service: TwilioService
+    conversation_store: ConversationStore
+
+# user_state key holding the ID of the reflection batch job in flight
+_BATCH_STATE_KEY = 'reflection_batch_id'
+
+# How often reflection batches are submitted/collected
+PREPARE_INTERVAL = timedelta(minutes=15)
+
+# Longest the loop sleeps. Schedules are added by other processes (the app, demo), so
+# each wake-up checks a cheap change marker and re-reads the schedule only if it moved
+POLL_INTERVAL = timedelta(seconds=60)
+
+def _next_occurrence(schedule_time: str, after: datetime) -> datetime:
+    """Return the first time of day matching HH:MM that is strictly after `after`"""
+    hour, minute = map(int, schedule_time.split(':'))
+    candidate = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= after:
+        candidate += timedelta(days=1)
+    return candidate
+
+def _verse_ref(msg):
+    """Build the verse reference string for a scheduled message"""
+    return format_reference(msg['book'], msg['chapter'], msg['start_verse'], msg['end_verse'])
+
+def _pending_verse_texts(services: Services) -> Dict[str, str]:
+    """
+    Fetch the text of every pending verse that is sent with a reflection
+    
+    Stored reflections are keyed by verse text as well as reference, so the text is
+    needed both to look them up and to save them.
+    
+    Returns:
+        Dict mapping verse reference to verse text (verses that could not be fetched are left out)
+    """
+    wanted = [msg for msg in services.conversation_store.get_pending_scheduled_messages()
+              if msg['include_reflection']]
+    verses = services.bible_service.get_verses_batch([
+        (msg['book'], msg['chapter'], msg['start_verse'], msg['end_verse'])
+        for msg in wanted
+    ])
+    texts = {}
+    for msg in wanted:
+        verse_text = verses[(msg['book'], msg['chapter'], msg['start_verse'], msg['end_verse'])]
+        if verse_text:
+            texts[_verse_ref(msg)] = verse_text
+    return texts
+
+def prepare_reflections(services: Services):
+    """
+    Generate reflections for upcoming scheduled verses with the OpenAI Batch API
+    
+    Collects the results of the batch in flight, if any; otherwise submits one batch
+    for every pending verse that has no stored reflection yet. Messages that come due
+    before their batch finishes are formatted directly at send time.
     
+    Args:
+        services: The shared service instances
+    """
     try:
-        # Initialize services
-        bible_service = BibleVerseService()
-        openai_service = OpenAIService()
-        twilio_service = TwilioService()
-        conversation_store = ConversationStore()
+        _, openai_service, _, conversation_store = services
+        # Without the Batch API there is nothing to prepare; OpenAIService already warned
+        if not openai_service.supports_batch:
+            return
+        fingerprint = openai_service.doctrine_fingerprint
         
-        # Get current time
-        current_time = datetime.now().strftime('%H:%M')
+        batch_id = conversation_store.get_state(_BATCH_STATE_KEY)
+        if batch_id:
+            results = openai_service.collect_reflection_batch(batch_id)
+            if results is None:
+                return
+            texts = _pending_verse_texts(services) if results else {}
+            stored = 0
+            for verse_ref, message in results.items():
+                if verse_ref in texts:
+                    conversation_store.save_reflection(verse_ref, texts[verse_ref], message, fingerprint)
+                    stored += 1
+            conversation_store.save_state(_BATCH_STATE_KEY, '')
+            log.info("Stored %d batched reflection(s)", stored)
+            return
         
-        # Get all pending scheduled messages
-        scheduled_messages = conversation_store.get_pending_scheduled_messages()
+        texts = _pending_verse_texts(services)
+        items = [
+            {'verse_text': verse_text, 'verse_reference': verse_ref}
+            for verse_ref, verse_text in texts.items()
+            if not conversation_store.get_reflection(verse_ref, verse_text, fingerprint)
+        ]
+        if not items:
+            return
         
-        for msg in scheduled_messages:
-            # Check if it's time to send this message
-            if msg['schedule_time'] == current_time:
-                print(f"Sending scheduled verse: {msg['book']} {msg['chapter']}:{msg['start_verse']}")
-                
-                # Fetch verse
-                verse_text = bible_service.get_verse(
-                    msg['book'], 
-                    msg['chapter'], 
-                    msg['start_verse'], 
-                    msg['end_verse']
+        batch_id = openai_service.submit_reflection_batch(items)
+        if batch_id:
+            conversation_store.save_state(_BATCH_STATE_KEY, batch_id)
+            log.info("Submitted reflection batch %s for %d verse(s)", batch_id, len(items))
+        
+    except Exception:
+        log.exception("Error in prepare_reflections")
+
+def _record_sends(conversation_store: ConversationStore, sends):
+    """
+    Mark delivered scheduled messages as sent and add them to the conversation history
+    
+    Args:
+        conversation_store: The store to write to
+        sends: (scheduled message, message text, send result) tuples
+    """
+    # Conversation history rows and sent IDs, written in one transaction after the sends
+    sent_rows = []
+    sent_ids = []
+    for msg, formatted_message, result in sends:
+        if result['status'] == 'success':
+            log.info("✅ SMS sent successfully: %s", result['message_sid'])
+            
+            # Queue for conversation history
+            sent_rows.append((msg['recipient_number'], 'outgoing', formatted_message, result['message_sid']))
+            
+            # Queue to be marked as sent
+            sent_ids.append(msg['id'])
+        else:
+            log.error("❌ Failed to send SMS: %s", result.get('error'))
+    
+    # Mark as sent and store in conversation history with a single commit
+    if sent_rows:
+        with conversation_store.transaction():
+            conversation_store.mark_scheduled_messages_sent(sent_ids)
+            conversation_store.add_messages(sent_rows)
+
+def send_scheduled_verses(services: Services, schedule_time: Optional[str] = None):
+    """
+    Send the pending verses scheduled for a time of day
+    
+    Args:
+        services: The shared service instances
+        schedule_time: Time in HH:MM format (defaults to the current minute)
+    """
+    log.info("Checking for scheduled verses...")
+    
+    try:
+        bible_service, openai_service, twilio_service, conversation_store = services
+        
+        # Get the pending messages due at this time
+        due_messages = conversation_store.get_due_scheduled_messages(
+            schedule_time or datetime.now().strftime('%H:%M')
+        )
+        
+        # Fetch all due verses concurrently
+        verses = bible_service.get_verses_batch([
+            (msg['book'], msg['chapter'], msg['start_verse'], msg['end_verse'])
+            for msg in due_messages
+        ])
+        
+        # Keep the messages whose verse could be fetched
+        ready = []
+        for msg in due_messages:
+            log.info("Sending scheduled verse: %s %d:%d", msg['book'], msg['chapter'], msg['start_verse'])
+            
+            verse_text = verses[(msg['book'], msg['chapter'], msg['start_verse'], msg['end_verse'])]
+            if verse_text:
+                ready.append((msg, verse_text, _verse_ref(msg)))
+            else:
+                log.error("❌ Could not fetch verse")
+        
+        # Reuse reflections already generated for this doctrine (previews, pre-generation,
+        # earlier sends); verse-only messages need no model call either. Each distinct
+        # message is looked up once, however many recipients share it
+        fingerprint = openai_service.doctrine_fingerprint
+        distinct = {}
+        for msg, verse_text, verse_ref in ready:
+            key = (verse_ref, msg['include_reflection'])
+            if key not in distinct:
+                distinct[key] = (
+                    conversation_store.get_reflection(verse_ref, verse_text, fingerprint) if msg['include_reflection']
+                    else openai_service.format_verse_with_reflection(verse_text, verse_ref, False)
                 )
-                
-                if verse_text:
-                    # Create reference
-                    verse_ref = f"{msg['book']} {msg['chapter']}:{msg['start_verse']}"
-                    if msg['end_verse'] != msg['start_verse']:
-                        verse_ref += f"-{msg['end_verse']}"
-                    
-                    # Format with OpenAI
-                    formatted_message = openai_service.format_verse_with_reflection(
-                        verse_text, 
-                        verse_ref, 
-                        msg['include_reflection']
-                    )
-                    
-                    # Send SMS
-                    result = twilio_service.send_sms(
-                        formatted_message,
-                        msg['recipient_number']
-                    )
-                    
-                    if result['status'] == 'success':
-                        print(f"✅ SMS sent successfully: {result['message_sid']}")
-                        
-                        # Store in conversation history
-                        conversation_store.add_message(
-                            phone_number=msg['recipient_number'],
-                            direction='outgoing',
-                            message_text=formatted_message,
-                            message_sid=result['message_sid']
-                        )
-                        
-                        # Mark as sent
-                        conversation_store.mark_scheduled_message_sent(msg['id'])
+        formatted_messages = [
+            distinct[(verse_ref, msg['include_reflection'])] for msg, _, verse_ref in ready
+        ]
+        known = [idx for idx, message in enumerate(formatted_messages) if message]
+        missing = [idx for idx, message in enumerate(formatted_messages) if not message]
+        
+        results = [None] * len(ready)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Send the messages that are ready now while OpenAI formats the rest; with
+            # nothing to send yet, set up the Twilio connection so it is ready after formatting
+            if known:
+                early_sends = executor.submit(twilio_service.send_sms_batch, [
+                    (formatted_messages[idx], ready[idx][0]['recipient_number'], ready[idx][0]['channel'])
+                    for idx in known
+                ])
+            elif missing:
+                executor.submit(twilio_service.warm_up)
+            
+            try:
+                # Format each missing verse once, with as few OpenAI requests as possible
+                missing_verses = {ready[idx][2]: ready[idx][1] for idx in missing}
+                new_messages = dict(zip(missing_verses, openai_service.format_verses_batch([
+                    {'verse_text': verse_text, 'verse_reference': verse_ref}
+                    for verse_ref, verse_text in missing_verses.items()
+                ], fallback=False)))
+                # Only real model output is stored; a verse that failed this time gets the
+                # fallback text now and another try on the next tick
+                for verse_ref, message in new_messages.items():
+                    if message:
+                        conversation_store.save_reflection(verse_ref, missing_verses[verse_ref], message, fingerprint)
                     else:
-                        print(f"❌ Failed to send SMS: {result.get('error')}")
-                else:
-                    print(f"❌ Could not fetch verse")
-                    
-    except Exception as e:
-        print(f"Error in send_scheduled_verses: {e}")
-        import traceback
-        traceback.print_exc()
+                        new_messages[verse_ref] = fallback_message(missing_verses[verse_ref], verse_ref)
+                for idx in missing:
+                    formatted_messages[idx] = new_messages[ready[idx][2]]
+                
+                late_results = twilio_service.send_sms_batch([
+                    (formatted_messages[idx], ready[idx][0]['recipient_number'], ready[idx][0]['channel'])
+                    for idx in missing
+                ])
+            except Exception:
+                # The early batch may already have been delivered; record it before giving
+                # up so those recipients are not sent the verse again on the next tick
+                if known:
+                    _record_sends(conversation_store, [
+                        (ready[idx][0], formatted_messages[idx], result)
+                        for idx, result in zip(known, early_sends.result())
+                    ])
+                raise
+            
+            if known:
+                for idx, result in zip(known, early_sends.result()):
+                    results[idx] = result
+            for idx, result in zip(missing, late_results):
+                results[idx] = result
+        
+        _record_sends(conversation_store, [
+            (msg, formatted_message, result)
+            for (msg, _, _), formatted_message, result in zip(ready, formatted_messages, results)
+        ])
+        
+    except Exception:
+        log.exception("Error in send_scheduled_verses")
 
 def main():
     """Main scheduler loop"""
-    print("📅 Bible Verse Scheduler started")
-    print("Checking for scheduled verses every minute...")
-    print("⚠️  For production, consider using a cron job that runs at specific times instead of continuous polling")
+    configure_logging()
+    log.info("📅 Bible Verse Scheduler started")
+    log.info("Sleeping until the next scheduled verse...")
+    
+    # Create the services once so their HTTP connection pools and the database
+    # connection are reused across runs
+    try:
+        services = Services(
+            bible_service=BibleVerseService(),
+            openai_service=OpenAIService(),
+            twilio_service=TwilioService(),
+            conversation_store=ConversationStore()
+        )
+    except Exception as e:
+        log.error("Error initializing services: %s", e)
+        return
+    conversation_store = services.conversation_store
     
-    # Schedule the check to run every minute
-    schedule.every(1).minutes.do(send_scheduled_verses)
+    # Include the current minute so a schedule due right now still goes out
+    checked_until = datetime.now() - timedelta(minutes=1)
+    next_prepare = datetime.now()
+    marker = None
+    pending_times = set()
     
-    # Run the scheduler
     while True:
-        schedule.run_pending()
-        time.sleep(30)  # Check every 30 seconds
+        now = datetime.now()
+        
+        # Prepare upcoming reflections at batch pricing
+        if now >= next_prepare:
+            prepare_reflections(services)
+            next_prepare = now + PREPARE_INTERVAL
+        
+        # Re-read the pending schedule only when rows were added, sent or deleted
+        current_marker = conversation_store.get_schedule_marker()
+        if current_marker != marker:
+            pending_times = {msg['schedule_time'] for msg in conversation_store.get_pending_scheduled_messages()}
+            marker = current_marker
+        
+        # Fire every schedule time passed since the last check, even if this wake-up
+        # came late, so a busy minute is never skipped
+        for schedule_time in sorted(pending_times):
+            if _next_occurrence(schedule_time, checked_until) <= now:
+                send_scheduled_verses(services, schedule_time)
+        checked_until = now
+        
+        # Sleep until the next schedule time, reflection batch or poll, whichever is first
+        wake = min([next_prepare, now + POLL_INTERVAL] + [_next_occurrence(t, now) for t in pending_times])
+        time.sleep(max(0.0, (wake - datetime.now()).total_seconds()))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,60 @@
+"""
+Tests for ConversationStore connection handling
+Run with: python -m unittest test_conversation_store
+"""
+import gc
+import os
+import tempfile
+import threading
+import unittest
+
+from conversation_store import ConversationStore
+
+class PerThreadConnectionTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = ConversationStore(os.path.join(self._tmp.name, 'test.db'), per_thread=True)
+    
+    def tearDown(self):
+        self.store.close()
+        self._tmp.cleanup()
+    
+    def _run_threads(self, work, count=50):
+        threads = [threading.Thread(target=work) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        gc.collect()
+    
+    def test_exited_threads_release_their_connections(self):
+        def work():
+            self.store.add_message('+15550001111', 'incoming', 'hello')
+            self.store.get_latest_message_id('+15550001111')
+        
+        self._run_threads(work)
+        
+        # Only the connection the constructor opened on this thread is left
+        self.assertLessEqual(len(self.store._connections), 1)
+        self.assertEqual(self.store.get_latest_message_id('+15550001111'), 50)
+    
+    def test_close_thread_connection(self):
+        def work():
+            self.store.get_latest_message_id('+15550001111')
+            self.store.close_thread_connection()
+            self.assertEqual(len(self.store._connections), before)
+        
+        before = len(self.store._connections)
+        # Threads run one at a time so the count after each close is exact
+        for _ in range(5):
+            self._run_threads(work, count=1)
+        self.assertEqual(len(self.store._connections), before)
+    
+    def test_thread_reopens_after_close(self):
+        self.store.add_message('+15550001111', 'incoming', 'first')
+        self.store.close_thread_connection()
+        self.store.add_message('+15550001111', 'incoming', 'second')
+        self.assertEqual(self.store.get_latest_message_id('+15550001111'), 2)
+
+if __name__ == '__main__':
+    unittest.main()
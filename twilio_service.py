@@ -2,55 +2,100 @@
 Twilio SMS/WhatsApp service for sending and receiving messages
 """
 import os
-from typing import Optional, Dict
-from twilio.rest import Client
-from twilio.twiml.messaging_response import MessagingResponse
-from dotenv import load_dotenv
+import base64
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Tuple, Literal
+from xml.sax.saxutils import escape
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-load_dotenv()
+log = logging.getLogger(__name__)
+
+# Read once at import; entry points load .env before importing this module
+_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
+_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
+_FROM_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
+_DEFAULT_RECIPIENT = os.getenv('RECIPIENT_PHONE_NUMBER')
+
+_API_BASE = "https://api.twilio.com/2010-04-01"
+
+_TWIML_PROLOG = '<?xml version="1.0" encoding="UTF-8"?>'
+
+def twiml_message(response_text: str) -> str:
+    """
+    TwiML replying with one message, written directly from a template
+    
+    Same output as twilio's MessagingResponse for this fixed shape, without
+    building and serializing an ElementTree on every call.
+    """
+    return f'{_TWIML_PROLOG}<Response><Message>{escape(response_text)}</Message></Response>'
+
+Channel = Literal['sms', 'whatsapp']
+DEFAULT_CHANNEL: Channel = 'whatsapp'
 
 class TwilioService:
     def __init__(self):
-        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-        auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-        
-        if not account_sid or not auth_token:
+        if not _ACCOUNT_SID or not _AUTH_TOKEN:
             raise ValueError("TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN must be set in environment variables")
         
-        self.client = Client(account_sid, auth_token)
-        self.from_number = os.getenv('TWILIO_PHONE_NUMBER')
-        self.default_recipient = os.getenv('RECIPIENT_PHONE_NUMBER')
+        # Sends go straight to the REST endpoint; sending one message is a single form
+        # POST, and the SDK's resource objects only add per-call overhead
+        self._messages_url = f"{_API_BASE}/Accounts/{_ACCOUNT_SID}/Messages.json"
+        self._account_url = f"{_API_BASE}/Accounts/{_ACCOUNT_SID}.json"
+        
+        # Pooled session sized for send_sms_batch, so connections stay open between sends
+        # instead of being discarded past the default pool size of 10. The basic-auth
+        # header is encoded once rather than on every request
+        credentials = base64.b64encode(f"{_ACCOUNT_SID}:{_AUTH_TOKEN}".encode()).decode()
+        self._session = requests.Session()
+        self._session.headers['Authorization'] = f"Basic {credentials}"
+        # Up to 3 attempts with exponential backoff, honoring Retry-After. Only failures
+        # where Twilio cannot have accepted the message are retried (connection errors
+        # and 429), so a send is never duplicated
+        retry = Retry(total=2, connect=2, read=0, status=2, status_forcelist=[429],
+                      allowed_methods=frozenset({'GET', 'POST'}), backoff_factor=0.5,
+                      respect_retry_after_header=True, raise_on_status=False)
+        self._session.mount('https://', HTTPAdapter(pool_connections=20, pool_maxsize=20,
+                                                    max_retries=retry))
+        self.from_number = _FROM_NUMBER
+        self.default_recipient = _DEFAULT_RECIPIENT
         
         if not self.from_number:
             raise ValueError("TWILIO_PHONE_NUMBER must be set in environment variables")
     
-    def _format_whatsapp_number(self, phone_number: str) -> str:
+    @staticmethod
+    def channel_for(phone_number: str) -> Channel:
+        """Channel a Twilio address belongs to, e.g. the From of an incoming message"""
+        return 'whatsapp' if phone_number.startswith('whatsapp:') else 'sms'
+    
+    def _format_number(self, phone_number: str, channel: Channel = DEFAULT_CHANNEL) -> str:
         """
-        Format phone number for WhatsApp if not already formatted.
+        Format phone number for the channel if not already formatted.
         
         Args:
             phone_number: Phone number (e.g., '+1234567890' or 'whatsapp:+1234567890')
+            channel: 'whatsapp' to add the 'whatsapp:' prefix, 'sms' to remove it
         
         Returns:
-            WhatsApp-formatted number (e.g., 'whatsapp:+1234567890')
+            Channel-formatted number (e.g., 'whatsapp:+1234567890' or '+1234567890')
         """
         if not phone_number:
             return phone_number
         
-        # If already prefixed with 'whatsapp:', return as is
-        if phone_number.startswith('whatsapp:'):
-            return phone_number
-        
-        # Add 'whatsapp:' prefix
-        return f'whatsapp:{phone_number}'
+        bare_number = phone_number[len('whatsapp:'):] if phone_number.startswith('whatsapp:') else phone_number
+        return f'whatsapp:{bare_number}' if channel == 'whatsapp' else bare_number
     
-    def send_sms(self, message: str, to_number: Optional[str] = None) -> Dict[str, str]:
+    def send_sms(self, message: str, to_number: Optional[str] = None,
+                 channel: Channel = DEFAULT_CHANNEL) -> Dict[str, str]:
         """
-        Send a WhatsApp message via Twilio
+        Send a WhatsApp or SMS message via Twilio
         
         Args:
             message: The message text to send
             to_number: Recipient phone number (uses default if not provided)
+            channel: 'whatsapp' or 'sms'
         
         Returns:
             Dict with status and message_sid or error
@@ -64,20 +109,28 @@ class TwilioService:
             }
         
         try:
-            # Format numbers for WhatsApp
-            from_whatsapp = self._format_whatsapp_number(self.from_number)
-            to_whatsapp = self._format_whatsapp_number(recipient)
+            # Both numbers use the same channel's format
+            from_address = self._format_number(self.from_number, channel)
+            to_address = self._format_number(recipient, channel)
             
-            message_obj = self.client.messages.create(
-                body=message,
-                from_=from_whatsapp,
-                to=to_whatsapp
-            )
+            # Separate connect/read timeouts
+            response = self._session.post(self._messages_url, data={
+                'Body': message,
+                'From': from_address,
+                'To': to_address
+            }, timeout=(3.05, 15))
+            payload = response.json()
+            
+            if not response.ok:
+                return {
+                    'status': 'error',
+                    'error': f"HTTP {response.status_code}: {payload.get('message', response.reason)}"
+                }
             
             return {
                 'status': 'success',
-                'message_sid': message_obj.sid,
-                'to': to_whatsapp
+                'message_sid': payload['sid'],
+                'to': to_address
             }
         except Exception as e:
             return {
@@ -85,6 +138,30 @@ class TwilioService:
                 'error': str(e)
             }
     
+    def warm_up(self):
+        """Open a pooled connection to the Twilio API ahead of a burst of sends"""
+        try:
+            self._session.get(self._account_url, timeout=(3.05, 10))
+        except Exception as e:
+            log.error("Error warming up Twilio connection: %s", e)
+    
+    def send_sms_batch(self, pairs: List[Tuple],
+                       max_workers: int = 16) -> List[Dict[str, str]]:
+        """
+        Send several messages concurrently, possibly over different channels
+        
+        Args:
+            pairs: List of (message, to_number) or (message, to_number, channel) tuples
+            max_workers: Maximum number of requests in flight at once
+        
+        Returns:
+            send_sms results in the same order as pairs
+        """
+        if not pairs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pairs))) as executor:
+            return list(executor.map(lambda pair: self.send_sms(*pair), pairs))
+    
     def create_webhook_response(self, response_text: str) -> str:
         """
         Create a TwiML response for Twilio webhook
@@ -95,9 +172,7 @@ class TwilioService:
         Returns:
             TwiML XML string
         """
-        response = MessagingResponse()
-        response.message(response_text)
-        return str(response)
+        return twiml_message(response_text)
     
     def parse_incoming_message(self, request_data: Dict) -> Dict[str, str]:
         """
@@ -107,11 +182,14 @@ class TwilioService:
             request_data: The request form data from Twilio
         
         Returns:
-            Dict with from_number, to_number, and message_body
+            Dict with from_number, to_number, message_body, message_sid, and
+            channel (the channel to reply on)
         """
+        from_number = request_data.get('From', '')
         return {
-            'from_number': request_data.get('From', ''),
+            'from_number': from_number,
             'to_number': request_data.get('To', ''),
             'message_body': request_data.get('Body', ''),
-            'message_sid': request_data.get('MessageSid', '')
+            'message_sid': request_data.get('MessageSid', ''),
+            'channel': self.channel_for(from_number)
         }
@@ -3,36 +3,154 @@ Webhook handler for Twilio WhatsApp replies
 Run this as a separate Flask app or integrate with your deployment
 """
 from flask import Flask, request, Response
-from twilio_service import TwilioService
+from dotenv import load_dotenv
+
+# Load .env before the services read their settings at import
+load_dotenv()
+
+from logging_config import configure_logging
+
+from twilio_service import TwilioService, twiml_message
 from openai_service import OpenAIService
 from conversation_store import ConversationStore
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
 import os
 
+# Log output is written off the request threads
+configure_logging()
+log = logging.getLogger(__name__)
+
 app = Flask(__name__)
 
+# TwiML bodies that never change, encoded once so responses skip the str->bytes step.
+# Built without twilio_service so the error path still works when the services
+# failed to initialize
+ERROR_MESSAGE = "I'm sorry, I encountered an error. Please try again later."
+ERROR_TWIML = twiml_message(ERROR_MESSAGE).encode()
+EMPTY_TWIML = b'<?xml version="1.0" encoding="UTF-8"?><Response/>'
+
+# Replies are generated and sent here so the webhook can answer Twilio right away
+_reply_executor = ThreadPoolExecutor(max_workers=20, thread_name_prefix='reply')
+
+# Messages of context sent with each question (3 exchanges)
+HISTORY_LENGTH = 6
+
+# phone number -> [ID of the newest message seen, deque of recent OpenAI-formatted messages].
+# Replies reuse the deque instead of re-reading history; it is reloaded whenever the
+# database has a newer message than the cache (e.g., a verse sent by the scheduler)
+_history_cache = {}
+_history_lock = threading.Lock()
+
+def _get_history(from_number):
+    """
+    Return the recent conversation for a number, read from the cache when it is current
+    
+    Returns:
+        Tuple of (OpenAI-formatted messages, ID of the newest message they include)
+    """
+    latest_id = conversation_store.get_latest_message_id(from_number)
+    with _history_lock:
+        entry = _history_cache.get(from_number)
+        if entry and entry[0] == latest_id:
+            return list(entry[1]), latest_id
+    
+    history = conversation_store.get_conversation_for_openai(from_number, HISTORY_LENGTH)
+    with _history_lock:
+        _history_cache[from_number] = [latest_id, deque(history, maxlen=HISTORY_LENGTH)]
+    return history, latest_id
+
+def _remember_exchange(from_number, history_id, question, question_id, answer, answer_id):
+    """
+    Add a question and its answer to the cached conversation
+    
+    Only done when the two were stored back to back and nothing else was stored for the
+    number since the history was read (e.g., a verse from the scheduler process);
+    otherwise the cache is left as is and reloads on the next request.
+    """
+    if answer_id != question_id + 1:
+        return
+    if conversation_store.get_latest_message_id(from_number, before_id=question_id) != history_id:
+        return
+    with _history_lock:
+        entry = _history_cache.get(from_number)
+        if entry and entry[0] == history_id:
+            entry[1].append({"role": "user", "content": question})
+            entry[1].append({"role": "assistant", "content": answer})
+            entry[0] = answer_id
+
 # Initialize services
 try:
     twilio_service = TwilioService()
     openai_service = OpenAIService()
-    conversation_store = ConversationStore()
+    # Flask serves requests on several threads; each gets its own connection
+    conversation_store = ConversationStore(per_thread=True)
 except ValueError as e:
-    print(f"Configuration error: {e}")
+    log.error("Configuration error: %s", e)
     twilio_service = None
     openai_service = None
     conversation_store = None
-except Exception as e:
-    print(f"Unexpected error initializing services: {e}")
-    import traceback
-    traceback.print_exc()
+except Exception:
+    log.exception("Unexpected error initializing services")
     twilio_service = None
     openai_service = None
     conversation_store = None
 
+def _process_incoming(from_number, channel, message_body, conversation_history, history_id, incoming_id):
+    """Generate a reply with OpenAI and send it on the channel it arrived on (runs on _reply_executor)"""
+    # Only a failure before anything reached the user earns the apology
+    try:
+        # Generate response using OpenAI
+        response_text = openai_service.answer_question(
+            question=message_body,
+            conversation_history=conversation_history
+        )
+        
+        # Send it as a separate message; the webhook response itself was empty
+        result = twilio_service.send_sms(response_text, from_number, channel)
+    except Exception as e:
+        log.error("Error replying to %s: %s", from_number, e)
+        twilio_service.send_sms(ERROR_MESSAGE, from_number, channel)
+        return
+    
+    sent = result['status'] == 'success'
+    if not sent:
+        log.error("❌ Failed to send reply to %s: %s", from_number, result.get('error'))
+    
+    # Store the outgoing message; Twilio already got its empty response, so a reply
+    # that could not be sent is kept as 'failed' rather than lost without a trace
+    try:
+        outgoing_id = conversation_store.add_message(
+            phone_number=from_number,
+            direction='outgoing' if sent else 'failed',
+            message_text=response_text,
+            message_sid=result.get('message_sid')
+        )
+    except Exception:
+        log.exception("Could not store the reply to %s", from_number)
+        return
+    
+    # Keep the cached history current without another query
+    if sent:
+        _remember_exchange(from_number, history_id, message_body, incoming_id,
+                           response_text, outgoing_id)
+
+@app.teardown_appcontext
+def _close_request_connection(exc):
+    """Close the request thread's database connection; the next request runs on a new thread"""
+    if conversation_store:
+        conversation_store.close_thread_connection()
+
 @app.route('/webhook/sms', methods=['POST'])
 def handle_sms_webhook():
     """
-    Handle incoming WhatsApp messages from Twilio
-    Note: Endpoint is named 'sms' for backward compatibility, but handles WhatsApp messages
+    Handle incoming WhatsApp and SMS messages from Twilio
+    Note: Endpoint is named 'sms' for backward compatibility; replies use the sender's channel
+    
+    The message is stored and Twilio gets an empty response immediately; the reply is
+    generated in the background and sent as an outbound message.
     """
     if not all([twilio_service, openai_service, conversation_store]):
         return Response("Service not configured", status=500)
@@ -44,41 +162,26 @@ def handle_sms_webhook():
         message_body = message_data['message_body']
         message_sid = message_data['message_sid']
         
+        # Get conversation history for context (before this message is added to it)
+        conversation_history, history_id = _get_history(from_number)
+        
         # Store incoming message
-        conversation_store.add_message(
+        incoming_id = conversation_store.add_message(
             phone_number=from_number,
             direction='incoming',
             message_text=message_body,
             message_sid=message_sid
         )
         
-        # Get conversation history for context
-        conversation_history = conversation_store.get_conversation_for_openai(from_number)
+        _reply_executor.submit(_process_incoming, from_number, message_data['channel'], message_body,
+                               conversation_history, history_id, incoming_id)
         
-        # Generate response using OpenAI
-        response_text = openai_service.answer_question(
-            question=message_body,
-            conversation_history=conversation_history
-        )
-        
-        # Store outgoing message
-        conversation_store.add_message(
-            phone_number=from_number,
-            direction='outgoing',
-            message_text=response_text
-        )
-        
-        # Return TwiML response
-        twiml = twilio_service.create_webhook_response(response_text)
-        return Response(twiml, mimetype='text/xml')
+        return Response(EMPTY_TWIML, mimetype='text/xml')
         
     except Exception as e:
-        print(f"Error handling webhook: {e}")
+        log.error("Error handling webhook: %s", e)
         # Return a generic error response
-        error_response = twilio_service.create_webhook_response(
-            "I'm sorry, I encountered an error. Please try again later."
-        )
-        return Response(error_response, mimetype='text/xml')
+        return Response(ERROR_TWIML, mimetype='text/xml')
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -87,4 +190,7 @@ def health_check():
 
 if __name__ == '__main__':
     port = int(os.getenv('WEBHOOK_PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    # Requests only store the message and queue the reply, so a thread per request is cheap;
+    # each request's connection is closed at teardown, and the reply pool's fixed threads
+    # keep one connection each
+    app.run(host='0.0.0.0', port=port, debug=False, threaded=True)